@@ -0,0 +1,38 @@
+"""
+Migration script to add denormalized vote/comment counters to the apps table.
+Run this once with: python add_app_counter_columns.py
+"""
+from sqlalchemy import text
+from app.database import engine, SessionLocal
+from app.services.counters import recount_app_counters
+
+def migrate():
+    with engine.connect() as conn:
+        # Check if columns already exist
+        result = conn.execute(text("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'apps' AND column_name = 'upvotes'
+        """))
+        if result.fetchone():
+            print("Counter columns already exist, skipping migration.")
+            return
+
+        print("Adding counter columns to apps table...")
+        conn.execute(text("ALTER TABLE apps ADD COLUMN upvotes INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text("ALTER TABLE apps ADD COLUMN downvotes INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text("ALTER TABLE apps ADD COLUMN comment_count INTEGER NOT NULL DEFAULT 0"))
+        conn.commit()
+
+    # Backfill from existing votes and comments
+    db = SessionLocal()
+    try:
+        fixed = recount_app_counters(db)
+        db.commit()
+        print(f"Backfilled counters for {fixed} apps.")
+    finally:
+        db.close()
+
+    print("Migration completed successfully!")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,16 @@
+"""
+Migration script to add the keyset pagination indexes to the apps table.
+Run this once with: python add_app_feed_indexes.py
+"""
+from app.database import engine
+from app.models.app import App
+
+def migrate():
+    for index in App.__table__.indexes:
+        if index.name and index.name.startswith("ix_apps_public_"):
+            print(f"Creating index {index.name} (if missing)...")
+            index.create(bind=engine, checkfirst=True)
+    print("Migration completed successfully!")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,46 @@
+"""
+Migration script to add precomputed ranking scores (top/hot/controversial) to the apps table.
+Run this once (after add_app_counter_columns.py) with: python add_app_ranking_columns.py
+"""
+from sqlalchemy import text
+from app.database import engine, SessionLocal
+from app.models.app import App
+from app.services.ranking import refresh_app_scores
+
+SCORE_COLUMNS = ("net_score", "hot_score", "controversy_score")
+
+def migrate():
+    with engine.connect() as conn:
+        # Check if columns already exist
+        result = conn.execute(text("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'apps' AND column_name = 'hot_score'
+        """))
+        if result.fetchone():
+            print("Ranking columns already exist, skipping migration.")
+            return
+
+        print("Adding ranking columns to apps table...")
+        conn.execute(text("ALTER TABLE apps ADD COLUMN net_score INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text("ALTER TABLE apps ADD COLUMN hot_score DOUBLE PRECISION NOT NULL DEFAULT 0"))
+        conn.execute(text("ALTER TABLE apps ADD COLUMN controversy_score DOUBLE PRECISION NOT NULL DEFAULT 0"))
+        conn.commit()
+
+    for index in App.__table__.indexes:
+        if index.name and any(index.name == f"ix_apps_public_{column}_id" for column in SCORE_COLUMNS):
+            print(f"Creating index {index.name}...")
+            index.create(bind=engine, checkfirst=True)
+
+    # Backfill from the vote counters
+    db = SessionLocal()
+    try:
+        updated = refresh_app_scores(db)
+        db.commit()
+        print(f"Computed ranking scores for {updated} apps.")
+    finally:
+        db.close()
+
+    print("Migration completed successfully!")
+
+if __name__ == "__main__":
+    migrate()
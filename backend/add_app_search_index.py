@@ -0,0 +1,41 @@
+"""
+Migration script to add the full-text search index for apps.
+PostgreSQL: generated tsvector column + GIN index. SQLite: FTS5 table + triggers.
+Run this once with: python add_app_search_index.py
+"""
+from sqlalchemy import text
+from app.database import engine
+from app.models.app import APP_SEARCH_DDL
+
+def migrate():
+    dialect = engine.dialect.name
+    statements = APP_SEARCH_DDL.get(dialect)
+    if not statements:
+        print(f"No search index for {dialect}, skipping migration.")
+        return
+
+    with engine.connect() as conn:
+        if dialect == "sqlite":
+            result = conn.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'apps_fts'"
+            ))
+            if result.fetchone():
+                print("Search index already exists, skipping migration.")
+                return
+
+        print("Adding full-text search index to apps table...")
+        for statement in statements:
+            conn.execute(text(statement))
+
+        if dialect == "sqlite":
+            # Triggers only cover new writes; index the existing rows
+            conn.execute(text("""
+                INSERT INTO apps_fts (app_id, name, full_description)
+                SELECT id, name, coalesce(full_description, '') FROM apps
+            """))
+
+        conn.commit()
+        print("Migration completed successfully!")
+
+if __name__ == "__main__":
+    migrate()
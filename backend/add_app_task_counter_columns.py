@@ -0,0 +1,37 @@
+"""
+Migration script to add denormalized task counters to the apps table.
+Run this once with: python add_app_task_counter_columns.py
+"""
+from sqlalchemy import text
+from app.database import engine, SessionLocal
+from app.services.counters import recount_task_counters
+
+def migrate():
+    with engine.connect() as conn:
+        # Check if columns already exist
+        result = conn.execute(text("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'apps' AND column_name = 'task_count'
+        """))
+        if result.fetchone():
+            print("Task counter columns already exist, skipping migration.")
+            return
+
+        print("Adding task counter columns to apps table...")
+        conn.execute(text("ALTER TABLE apps ADD COLUMN task_count INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text("ALTER TABLE apps ADD COLUMN completed_task_count INTEGER NOT NULL DEFAULT 0"))
+        conn.commit()
+
+    # Backfill from existing tasks (and auto-mode progress)
+    db = SessionLocal()
+    try:
+        fixed = recount_task_counters(db)
+        db.commit()
+        print(f"Backfilled task counters for {fixed} apps.")
+    finally:
+        db.close()
+
+    print("Migration completed successfully!")
+
+if __name__ == "__main__":
+    migrate()
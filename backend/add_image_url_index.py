@@ -0,0 +1,17 @@
+"""
+Migration script to index images.image_url, which uploads are now keyed by
+(content hash) and reference counted on.
+Run this once with: python add_image_url_index.py
+"""
+from app.database import engine
+from app.models.image import Image
+
+def migrate():
+    for index in Image.__table__.indexes:
+        if index.name == "ix_images_image_url":
+            print(f"Creating index {index.name} (if missing)...")
+            index.create(bind=engine, checkfirst=True)
+    print("Migration completed successfully!")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,31 @@
+"""
+Migration script to add the resized-derivatives column to the images table.
+Also turns JSON null values left by earlier versions into SQL NULL, so those
+images are picked up by the backfill. Safe to re-run.
+Run this once with: python add_image_variants_column.py
+Then create derivatives for existing images with: python generate_image_variants.py
+"""
+from sqlalchemy import text
+from app.database import engine
+
+def migrate():
+    with engine.connect() as conn:
+        # Check if column already exists
+        result = conn.execute(text("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'images' AND column_name = 'variants'
+        """))
+        if result.fetchone():
+            print("Variants column already exists.")
+        else:
+            print("Adding variants column to images table...")
+            conn.execute(text("ALTER TABLE images ADD COLUMN variants JSON"))
+
+        result = conn.execute(text("UPDATE images SET variants = NULL WHERE variants::text = 'null'"))
+        if result.rowcount:
+            print(f"Reset {result.rowcount} JSON null variants to NULL.")
+        conn.commit()
+        print("Migration completed successfully!")
+
+if __name__ == "__main__":
+    migrate()
@@ -23,6 +23,91 @@ class Settings(BaseSettings):
     github_client_secret: str = ""
     github_redirect_uri: str = ""
 
+    # Shared GitHub/GitLab HTTP clients (services/repository.py)
+    repo_http2: bool = True  # used when the optional h2 package is installed
+    repo_http_max_connections: int = 20
+    repo_http_max_keepalive_connections: int = 10
+    repo_http_keepalive_expiry_seconds: float = 60.0
+    repo_http_timeout_seconds: float = 10.0
+    repo_http_connect_timeout_seconds: float = 5.0
+    repo_fetch_deadline_seconds: float = 8.0  # shared budget for commits + repo info
+
+    # Repository metadata cache (services/repo_cache.py): "memory" (per-worker LRU),
+    # "sqlite" (file shared by all workers; repo_cache_url is the path) or
+    # "redis" (repo_cache_url is a redis:// URL; needs the redis package)
+    repo_cache_backend: str = "memory"
+    repo_cache_url: str = "./repo_cache.sqlite3"
+    repo_cache_max_entries: int = 2048
+    repo_cache_ttl_seconds: int = 300
+    repo_cache_stale_seconds: int = 3600  # served while one background refresh runs
+    # Share of each upstream rate-limit budget kept for interactive requests
+    repo_rate_limit_background_reserve: float = 0.2
+    # Background refresh of persisted commit snapshots (0 disables the worker)
+    commit_prefetch_interval_minutes: int = 30
+    repo_snapshot_max_age_seconds: int = 3600  # older snapshots refresh when viewed
+    # Push webhooks (routers/webhooks.py); an empty secret disables that endpoint
+    github_webhook_secret: str = ""
+    gitlab_webhook_secret: str = ""
+
+    # /uploads serving (utils/static_files.py). Content-addressed originals are
+    # always cached as immutable; max_age applies to derivatives and older
+    # uuid-named files.
+    # uploads_offload: "" (serve from Python), "x-accel-redirect" (nginx, with an
+    # internal location at uploads_accel_prefix) or "x-sendfile" (Apache/lighttpd)
+    uploads_max_age_seconds: int = 3600
+    uploads_offload: str = ""
+    uploads_accel_prefix: str = "/internal-uploads/"
+
+    # Where uploads are stored (services/storage.py): "local" (upload_dir, served
+    # at /uploads) or "s3" (any S3-compatible store such as MinIO; needs boto3).
+    # Only "s3" supports presigned direct uploads from the browser.
+    storage_backend: str = "local"
+    s3_bucket: str = ""
+    s3_endpoint_url: str = ""  # e.g. http://localhost:9000 for MinIO; empty for AWS
+    s3_region: str = "us-east-1"
+    s3_access_key_id: str = ""  # empty uses the default boto3 credential chain
+    s3_secret_access_key: str = ""
+    s3_public_url: str = ""  # base URL objects are served from (CDN); defaults to the bucket URL
+    s3_presign_expires_seconds: int = 600
+
+    # Response compression (utils/compression.py): brotli/gzip for bodies of at
+    # least compression_minimum_size bytes; excluded paths are served as-is
+    # (uploads are images, which are already compressed)
+    compression_minimum_size: int = 1024
+    compression_exclude_paths: List[str] = ["/uploads"]
+    compression_brotli_quality: int = 4
+    compression_gzip_level: int = 6
+
+    # Check payloads that hot routes send without re-validation (utils/fast_json.py)
+    # against their schema; for development, it costs what the fast path saves
+    fast_json_validate_trusted: bool = False
+
+    # Built frontend (static/) is served from memory (utils/spa_assets.py);
+    # index.html is re-checked at most this often; a changed one (a redeploy)
+    # reloads the whole manifest
+    spa_index_ttl_seconds: float = 30.0
+
+    # Resized image derivatives made after upload (services/image_variants.py);
+    # formats Pillow can't encode (e.g. avif without pillow-avif-plugin) are skipped
+    image_variant_widths: List[int] = [320, 640, 1280]
+    image_variant_formats: List[str] = ["webp", "avif"]
+    image_variant_workers: int = 1  # 0 runs in the threadpool instead
+
+    # Event-loop lag monitor (utils/loop_monitor.py); interval 0 disables
+    loop_lag_interval_seconds: float = 0.5
+    loop_lag_warn_ms: float = 100.0
+
+    # Authenticated-user cache (utils/user_cache.py); size 0 disables
+    user_cache_size: int = 2048
+    user_cache_ttl_seconds: int = 60
+
+    # bcrypt process pool (utils/security.py); 0 workers hashes in the threadpool
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 64
+
+    # How often the hot ranking is re-decayed in the background (0 disables)
+    hot_score_decay_interval_minutes: int = 15
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -1,15 +1,27 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from pathlib import Path
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import mimetypes
 import os
 from .config import settings
 from .database import engine, Base
-from .routers import auth, apps, images, tags, votes, comments, annotations, teams, app_requests, notifications
+from .services.ranking import run_hot_score_decay
+from .services.commit_prefetch import run_commit_prefetcher
+from .services.repository import start_http_clients, close_http_clients, cache_stats as repository_cache_stats, rate_limiter
+from .services.repo_cache import close_repo_cache
+from .services.image_variants import start_image_workers, shutdown_image_workers
+from .utils.user_cache import user_cache
+from .utils.loop_monitor import LoopLagMonitor
+from .utils.static_files import UploadStaticFiles
+from .utils.spa_assets import SpaAssets
+from .utils.compression import CompressionMiddleware, compression_stats
+from .utils.security import password_hash_pool
+from .routers import auth, apps, images, tags, votes, comments, annotations, teams, app_requests, notifications, webhooks
 # Import all models to register them with SQLAlchemy
-from .models import user, app, team, image, tag, vote, comment, annotation, app_request, claim_request, notification
+from .models import user, app, team, image, tag, vote, comment, annotation, app_request, claim_request, notification, repository_snapshot
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -25,6 +37,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
+)
+
+# Outermost, so every API response (including CORS/error ones) can be compressed
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    exclude_paths=settings.compression_exclude_paths,
+    brotli_quality=settings.compression_brotli_quality,
+    gzip_level=settings.compression_gzip_level
 )
 
 # Include API routers first (so they take precedence)
@@ -38,34 +60,90 @@ app.include_router(annotations.router)
 app.include_router(teams.router)
 app.include_router(app_requests.router)
 app.include_router(notifications.router)
+app.include_router(webhooks.router)
+
+loop_monitor = LoopLagMonitor(settings.loop_lag_interval_seconds, settings.loop_lag_warn_ms)
+
+# Frontend production build (copied to backend/static by the Dockerfile)
+static_dir = Path(__file__).parent.parent / "static"
+spa_assets = SpaAssets(static_dir, settings.spa_index_ttl_seconds)
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    password_hash_pool.start()
+    start_image_workers()
+    start_http_clients()
+    if static_dir.exists():
+        await run_in_threadpool(spa_assets.load)
+    if settings.loop_lag_interval_seconds > 0:
+        asyncio.create_task(loop_monitor.run())
+    if settings.hot_score_decay_interval_minutes > 0:
+        asyncio.create_task(run_hot_score_decay(settings.hot_score_decay_interval_minutes))
+    if settings.commit_prefetch_interval_minutes > 0:
+        asyncio.create_task(run_commit_prefetcher(settings.commit_prefetch_interval_minutes))
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    password_hash_pool.shutdown()
+    shutdown_image_workers()
+    await close_http_clients()
+    await close_repo_cache()
+
 
 @app.get("/api/health")
 def health_check():
     return {"status": "healthy"}
 
+
+@app.get("/api/metrics")
+def metrics():
+    """In-process counters for sizing caches and pools (per worker)."""
+    return {
+        "event_loop": loop_monitor.stats(),
+        "user_cache": user_cache.stats(),
+        "password_hashing": password_hash_pool.stats(),
+        "repository_cache": {"backend": settings.repo_cache_backend, **repository_cache_stats},
+        "upstream_rate_limits": rate_limiter.stats(),
+        "webhooks": webhooks.webhook_stats,
+        "spa_assets": spa_assets.stats(),
+        "compression": compression_stats
+    }
+
 # Serve uploaded files
-app.mount("/uploads", StaticFiles(directory=settings.upload_dir), name="uploads")
+# Image derivatives; older Pythons don't know these types
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+app.mount(
+    "/uploads",
+    UploadStaticFiles(
+        directory=settings.upload_dir,
+        max_age=settings.uploads_max_age_seconds,
+        offload=settings.uploads_offload,
+        accel_prefix=settings.uploads_accel_prefix
+    ),
+    name="uploads"
+)
 
 # Serve frontend static files (for production builds) - must be last to catch all other routes
-static_dir = Path(__file__).parent.parent / "static"
 if static_dir.exists():
-    app.mount("/assets", StaticFiles(directory=static_dir / "assets"), name="assets")
-    
-    @app.get("/{full_path:path}")
-    async def serve_frontend(full_path: str):
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+    async def serve_frontend(full_path: str, request: Request):
         """Serve frontend app - catch all routes not handled by API or uploads"""
         # Don't serve files for API routes
         if full_path.startswith("api/") or full_path.startswith("uploads/"):
-            return {"error": "Not found"}, 404
-        
-        # Check if it's a file request (has extension)
-        file_path = static_dir / full_path
-        if file_path.is_file() and file_path.exists():
-            return FileResponse(file_path)
-        
-        # For all other routes, serve index.html (client-side routing)
-        index_path = static_dir / "index.html"
-        if index_path.exists():
-            return FileResponse(index_path)
-        
-        return {"error": "Not found"}, 404
+            raise HTTPException(status_code=404, detail="Not found")
+
+        # Files come from the in-memory manifest built at startup (reloaded on redeploy)
+        asset = await spa_assets.get(full_path)
+        if asset is None:
+            # A missing hashed bundle must not be answered with HTML
+            if full_path.startswith("assets/"):
+                raise HTTPException(status_code=404, detail="Not found")
+            # For all other routes, serve index.html (client-side routing)
+            asset = await spa_assets.index()
+            if asset is None:
+                raise HTTPException(status_code=404, detail="Not found")
+
+        return spa_assets.response(asset, request.headers, request.method)
@@ -6,5 +6,6 @@ from .vote import Vote
 from .comment import Comment
 from .annotation import Annotation
 from .team import Team, TeamMember, TeamInvitation
+from .repository_snapshot import RepositorySnapshot
 
-__all__ = ["User", "App", "AppTag", "AppTask", "Image", "Tag", "Vote", "Comment", "Annotation", "Team", "TeamMember", "TeamInvitation"]
+__all__ = ["User", "App", "AppTag", "AppTask", "Image", "Tag", "Vote", "Comment", "Annotation", "Team", "TeamMember", "TeamInvitation", "RepositorySnapshot"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Enum, Integer
+from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Enum, Integer, Float, Index, text, event, DDL
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -34,6 +34,17 @@ class App(Base):
     repository_url = Column(String, nullable=True)
     app_url = Column(String, nullable=True)  # Live demo/app URL
     github_token = Column(String, nullable=True)  # Encrypted GitHub PAT for private repos
+    # Denormalized counters, maintained by the vote and comment routers
+    upvotes = Column(Integer, default=0, server_default="0", nullable=False)
+    downvotes = Column(Integer, default=0, server_default="0", nullable=False)
+    comment_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Denormalized AppTask counters; progress follows them in auto mode
+    task_count = Column(Integer, default=0, server_default="0", nullable=False)
+    completed_task_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Precomputed ranking scores for sort_by=top|hot|controversial (services/ranking.py)
+    net_score = Column(Integer, default=0, server_default="0", nullable=False)
+    hot_score = Column(Float, default=0.0, server_default="0", nullable=False)
+    controversy_score = Column(Float, default=0.0, server_default="0", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -45,6 +56,62 @@ class App(Base):
     comments = relationship("Comment", back_populates="app", cascade="all, delete-orphan")
     tags = relationship("Tag", secondary="app_tags", back_populates="apps")
     tasks = relationship("AppTask", back_populates="app", cascade="all, delete-orphan", order_by="AppTask.created_at")
+    repository_snapshot = relationship("RepositorySnapshot", uselist=False, cascade="all, delete-orphan")
+
+    # Composite (sort column, id) indexes backing keyset pagination of the
+    # public feed, one per sort_by option; partial so they only hold public apps
+    __table_args__ = tuple(
+        Index(
+            f"ix_apps_public_{column}_id", column, "id",
+            postgresql_where=text("is_published AND team_id IS NULL"),
+            sqlite_where=text("is_published AND team_id IS NULL")
+        )
+        for column in ("created_at", "updated_at", "name", "net_score", "hot_score", "controversy_score")
+    )
+
+
+# Full-text search over name/description (queried by services/search.py).
+# PostgreSQL keeps a generated, GIN-indexed tsvector column on apps; SQLite
+# (test databases) keeps an FTS5 shadow table in sync with triggers.
+APP_SEARCH_DDL = {
+    "postgresql": [
+        """
+        ALTER TABLE apps ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(full_description, '')), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_apps_search_vector ON apps USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS apps_fts
+        USING fts5(app_id UNINDEXED, name, full_description, tokenize='porter unicode61')
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS apps_fts_insert AFTER INSERT ON apps BEGIN
+            INSERT INTO apps_fts (app_id, name, full_description)
+            VALUES (new.id, new.name, coalesce(new.full_description, ''));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS apps_fts_update AFTER UPDATE OF name, full_description ON apps BEGIN
+            UPDATE apps_fts SET name = new.name, full_description = coalesce(new.full_description, '')
+            WHERE app_id = old.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS apps_fts_delete AFTER DELETE ON apps BEGIN
+            DELETE FROM apps_fts WHERE app_id = old.id;
+        END
+        """,
+    ],
+}
+
+for _dialect, _statements in APP_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(App.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
 
 
 class AppTag(Base):
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
 from datetime import datetime
+from typing import Dict
 
 from ..database import Base
 
@@ -12,11 +13,22 @@ class Image(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     app_id = Column(UUID(as_uuid=True), ForeignKey("apps.id"), nullable=False)
-    image_url = Column(String, nullable=False)
+    image_url = Column(String, nullable=False, index=True)  # content-addressed, shared by duplicates
     is_featured = Column(Boolean, default=False, nullable=False)
     order_index = Column(Integer, default=0, nullable=False)
+    # Resized derivatives: [{"url", "width", "height", "format"}], filled in after upload.
+    # None is stored as SQL NULL (not JSON null) so "not generated yet" is queryable
+    variants = Column(JSON(none_as_null=True), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
     app = relationship("App", back_populates="images")
     annotations = relationship("Annotation", back_populates="image", cascade="all, delete-orphan")
+
+    @property
+    def srcset(self) -> Dict[str, str]:
+        """Variants as one srcset string per format, e.g. {"webp": "/uploads/a-320w.webp 320w, ..."}."""
+        by_format: Dict[str, list] = {}
+        for variant in sorted(self.variants or [], key=lambda v: v["width"]):
+            by_format.setdefault(variant["format"], []).append(f"{variant['url']} {variant['width']}w")
+        return {fmt: ", ".join(entries) for fmt, entries in by_format.items()}
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+from ..database import Base
+
+
+class RepositorySnapshot(Base):
+    """Last fetched commits and repo info for an app, kept by the commit prefetcher."""
+    __tablename__ = "repository_snapshots"
+
+    app_id = Column(UUID(as_uuid=True), ForeignKey("apps.id"), primary_key=True)
+    # URL the snapshot was taken from; a mismatch means the app's repo changed
+    repository_url = Column(String, nullable=False)
+    commits = Column(JSON, nullable=False, default=list)
+    repo_info = Column(JSON, nullable=True)
+    commits_error = Column(String, nullable=True)
+    repo_info_error = Column(String, nullable=True)
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -18,8 +18,10 @@ from ..schemas.app_request import (
     ClaimRequestResponse,
 )
 from ..utils.dependencies import get_current_user, get_optional_user
+from ..utils.fast_json import ResponseSerializer
 
 router = APIRouter(prefix="/api/app-requests", tags=["app-requests"])
+app_request_list_serializer = ResponseSerializer(List[AppRequestResponse])
 
 
 def create_notification(
@@ -103,7 +105,8 @@ def get_app_requests(
         )
 
     app_requests = query.order_by(AppRequest.created_at.desc()).all()
-    return add_pending_claims_count(app_requests, db)
+    # Holds ORM objects, so it is validated - once, then encoded in pydantic-core
+    return app_request_list_serializer.respond(add_pending_claims_count(app_requests, db))
 
 
 @router.get("/{request_id}", response_model=AppRequestResponse)
@@ -1,39 +1,124 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import func, or_
 from typing import List, Optional
 from uuid import UUID
+import asyncio
 
+from ..config import settings
 from ..database import get_db
-from ..models.app import App, AppStatus, AppTag, AppTask
+from ..models.app import App, AppStatus, AppTag, AppTask, ProgressMode
 from ..models.image import Image
 from ..models.tag import Tag
 from ..models.user import User
 from ..schemas.app import AppCreate, AppUpdate, AppResponse, AppListItem, ImageResponse, TagResponse, TaskCreate, TaskUpdate, TaskResponse, CommitsResponse, CommitInfo, RepoInfo, GitHubTokenSet
+from ..services.counters import adjust_task_counters, task_progress
 from ..services.repository import repository_service
+from ..services.search import apply_search
+from ..services.upload import delete_upload_file
 from ..utils.dependencies import get_current_user
+from ..utils.fast_json import ResponseSerializer
+from ..utils.pagination import encode_cursor, decode_cursor, keyset_after
 
 router = APIRouter(prefix="/api/apps", tags=["apps"])
 
+# sort_by option -> column; ranked orders read precomputed scores (services/ranking.py)
+SORT_COLUMNS = {
+    "created_at": App.created_at,
+    "updated_at": App.updated_at,
+    "name": App.name,
+    "top": App.net_score,
+    "hot": App.hot_score,
+    "controversial": App.controversy_score,
+}
+
+
+# App columns that AppResponse exposes (github_token etc. are left out)
+APP_RESPONSE_COLUMNS = [name for name in AppResponse.model_fields if name in App.__table__.columns]
+app_list_serializer = ResponseSerializer(List[AppResponse])
+
+
+def _image_dict(image: Image) -> dict:
+    return {
+        "id": image.id,
+        "app_id": image.app_id,
+        "image_url": image.image_url,
+        "is_featured": image.is_featured,
+        "order_index": image.order_index,
+        "created_at": image.created_at,
+        "srcset": image.srcset,
+    }
+
+
+def _build_app_list(apps: List[App]) -> List[dict]:
+    """
+    Build listing response dicts with vote counts and creator info, in
+    exactly the AppResponse shape so they can be sent without re-validation.
+    """
+    result = []
+    
+    for app in apps:
+        upvotes = app.upvotes
+        downvotes = app.downvotes
+        
+        app_dict = {
+            **{name: getattr(app, name) for name in APP_RESPONSE_COLUMNS},
+            "images": [_image_dict(image) for image in app.images],
+            "tags": [{"id": tag.id, "name": tag.name} for tag in app.tags],
+            "tasks": [],
+            "vote_count": upvotes - downvotes,  # Keep for backward compatibility
+            "upvotes": upvotes,
+            "downvotes": downvotes,
+            "total_votes": upvotes + downvotes,
+            "comment_count": app.comment_count,
+            "creator": {
+                "id": app.creator.id,
+                "username": app.creator.username,
+                "full_name": app.creator.full_name
+            } if app.creator else None,
+            "has_github_token": False
+        }
+        result.append(app_dict)
+    
+    return result
+
 
 @router.get("", response_model=List[AppResponse])
 def get_apps(
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; replaces skip"),
     limit: int = Query(100, ge=1, le=100),
     status_filter: Optional[AppStatus] = Query(None, alias="status"),
     creator_id: Optional[UUID] = Query(None),
     team_id: Optional[UUID] = Query(None),
     search: Optional[str] = Query(None),
-    sort_by: str = Query("created_at", regex="^(created_at|updated_at|name)$"),
+    tag_id: Optional[List[UUID]] = Query(None, description="Only apps tagged with all of these tags"),
+    sort_by: Optional[str] = Query(None, regex="^(created_at|updated_at|name|top|hot|controversial|relevance)$"),
     order: str = Query("desc", regex="^(asc|desc)$"),
     db: Session = Depends(get_db)
 ):
+    """
+    List apps. With `search`, results are full-text matched (prefix match on
+    every word) and ranked by relevance unless another sort_by is given.
+    sort_by=top|hot|controversial order by scores precomputed on each vote.
+    Relevance-ranked results page with skip only; the other orders also
+    accept a cursor.
+    """
+    # Vote and comment counts are denormalized onto the app row, so the
+    # listing needs no aggregation; relationships are eager loaded
+    query = db.query(App).options(
+        joinedload(App.creator),
+        selectinload(App.images),
+        selectinload(App.tags)
+    )
+
     # If team_id is provided, get all team apps (not just published)
     # Otherwise only get public published apps (no team)
     if team_id:
-        query = db.query(App).filter(App.team_id == team_id)
+        query = query.filter(App.team_id == team_id)
     else:
-        query = db.query(App).filter(App.is_published == True, App.team_id == None)
+        query = query.filter(App.is_published == True, App.team_id == None)
     
     if status_filter:
         query = query.filter(App.status == status_filter)
@@ -41,53 +126,55 @@ def get_apps(
     if creator_id:
         query = query.filter(App.creator_id == creator_id)
     
-    if search:
-        query = query.filter(
-            or_(
-                App.name.ilike(f"%{search}%"),
-                App.full_description.ilike(f"%{search}%")
-            )
+    if tag_id:
+        tagged_app_ids = db.query(AppTag.app_id).filter(
+            AppTag.tag_id.in_(tag_id)
+        ).group_by(AppTag.app_id).having(
+            func.count(func.distinct(AppTag.tag_id)) == len(set(tag_id))
         )
+        query = query.filter(App.id.in_(tagged_app_ids))
     
-    # Sorting
-    if sort_by == "created_at":
-        order_by = App.created_at.desc() if order == "desc" else App.created_at.asc()
-    elif sort_by == "updated_at":
-        order_by = App.updated_at.desc() if order == "desc" else App.updated_at.asc()
-    else:  # name
-        order_by = App.name.desc() if order == "desc" else App.name.asc()
+    relevance = None
+    if search:
+        query, relevance = apply_search(db, query, search)
     
-    query = query.order_by(order_by)
+    if sort_by is None:
+        sort_by = "relevance" if relevance is not None else "created_at"
+    elif sort_by == "relevance" and relevance is None:
+        sort_by = "created_at"
     
-    apps = query.offset(skip).limit(limit).all()
+    if sort_by == "relevance":
+        apps = query.order_by(relevance, App.id).offset(skip).limit(limit).all()
+        return app_list_serializer.respond(_build_app_list(apps), trusted=True)
     
-    # Build response with vote counts
-    from ..models.vote import Vote, VoteType
-    result = []
+    # Sorting - always tie-break on id so the order is total and keyset-safe
+    sort_column = SORT_COLUMNS[sort_by]
+    descending = order == "desc"
     
-    for app in apps:
-        upvotes = db.query(Vote).filter(Vote.app_id == app.id, Vote.vote_type == VoteType.upvote).count()
-        downvotes = db.query(Vote).filter(Vote.app_id == app.id, Vote.vote_type == VoteType.downvote).count()
-        comment_count = len(app.comments)
-        
-        app_dict = {
-            **{c.name: getattr(app, c.name) for c in app.__table__.columns},
-            "images": app.images,
-            "tags": app.tags,
-            "vote_count": upvotes - downvotes,  # Keep for backward compatibility
-            "upvotes": upvotes,
-            "downvotes": downvotes,
-            "total_votes": upvotes + downvotes,
-            "comment_count": comment_count,
-            "creator": {
-                "id": app.creator.id,
-                "username": app.creator.username,
-                "full_name": app.creator.full_name
-            } if app.creator else None
-        }
-        result.append(app_dict)
+    if descending:
+        query = query.order_by(sort_column.desc(), App.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), App.id.asc())
     
-    return result
+    if cursor:
+        # Keyset pagination: seek past the last row of the previous page
+        # instead of counting through skipped rows
+        value, last_id = decode_cursor(cursor, sort_by, order, is_datetime=sort_by in ("created_at", "updated_at"))
+        query = query.filter(keyset_after(sort_column, App.id, value, last_id, descending))
+    else:
+        query = query.offset(skip)
+    
+    apps = query.limit(limit).all()
+    
+    # A full page means there may be more; hand out a cursor for the next one
+    headers = {}
+    if len(apps) == limit:
+        last = apps[-1]
+        headers["X-Next-Cursor"] = encode_cursor(
+            sort_by, order, getattr(last, sort_column.key), last.id
+        )
+    
+    return app_list_serializer.respond(_build_app_list(apps), trusted=True, headers=headers)
 
 
 @router.get("/{app_id}", response_model=AppResponse)
@@ -100,10 +187,9 @@ def get_app(app_id: UUID, db: Session = Depends(get_db)):
         )
 
     # Build response with has_github_token flag
-    from ..models.vote import Vote, VoteType
-    upvotes = db.query(Vote).filter(Vote.app_id == app.id, Vote.vote_type == VoteType.upvote).count()
-    downvotes = db.query(Vote).filter(Vote.app_id == app.id, Vote.vote_type == VoteType.downvote).count()
-    comment_count = len(app.comments)
+    upvotes = app.upvotes
+    downvotes = app.downvotes
+    comment_count = app.comment_count
 
     app_dict = {
         **{c.name: getattr(app, c.name) for c in app.__table__.columns if c.name != 'github_token'},
@@ -210,6 +296,10 @@ def update_app(
     for field, value in update_data.items():
         setattr(app, field, value)
     
+    # In auto mode progress always follows the task counters
+    if app.progress_mode == ProgressMode.auto:
+        app.progress = task_progress(app.completed_task_count, app.task_count)
+    
     if tag_ids is not None:
         tags = db.query(Tag).filter(Tag.id.in_(tag_ids)).all()
         app.tags = tags
@@ -238,8 +328,13 @@ def delete_app(
             detail="Not authorized to delete this app"
         )
     
+    files = [(image.image_url, image.variants) for image in app.images]
     db.delete(app)
     db.commit()
+
+    # Uploaded files go with the last image that references them
+    for image_url, variants in files:
+        delete_upload_file(image_url, db, variants)
     return None
 
 
@@ -275,6 +370,7 @@ def create_app_task(
         title=task_data.title
     )
     db.add(task)
+    adjust_task_counters(db, app_id, 1, 0)
     db.commit()
     db.refresh(task)
     return task
@@ -295,14 +391,18 @@ def update_app_task(
     if app.creator_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to update tasks for this app")
     
-    task = db.query(AppTask).filter(AppTask.id == task_id, AppTask.app_id == app_id).first()
+    task = db.query(AppTask).filter(
+        AppTask.id == task_id, AppTask.app_id == app_id
+    ).with_for_update().first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    was_completed = task.is_completed
     update_data = task_data.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(task, field, value)
     
+    adjust_task_counters(db, app_id, 0, int(task.is_completed) - int(was_completed))
     db.commit()
     db.refresh(task)
     return task
@@ -322,25 +422,26 @@ def delete_app_task(
     if app.creator_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete tasks for this app")
 
-    task = db.query(AppTask).filter(AppTask.id == task_id, AppTask.app_id == app_id).first()
+    task = db.query(AppTask).filter(
+        AppTask.id == task_id, AppTask.app_id == app_id
+    ).with_for_update().first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
     db.delete(task)
+    adjust_task_counters(db, app_id, -1, -int(task.is_completed))
     db.commit()
     return None
 
 
 # ==================== REPOSITORY/COMMITS ENDPOINTS ====================
 
-@router.get("/{app_id}/commits", response_model=CommitsResponse)
-async def get_app_commits(
-    app_id: UUID,
-    limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
-):
-    """Fetch recent commits from the app's linked repository."""
-    from ..services.repository import RepositoryService
+def _load_commits_source(app_id: UUID, db: Session):
+    """
+    Return (repository_url, current snapshot or None, GitHub token) for an
+    app. The token is only looked up when there is no usable snapshot.
+    """
+    from ..services.commit_prefetch import resolve_github_token
 
     app = db.query(App).filter(App.id == app_id).first()
     if not app:
@@ -349,44 +450,106 @@ async def get_app_commits(
             detail="App not found"
         )
 
+    snapshot = app.repository_snapshot
+    if snapshot is not None and snapshot.repository_url == app.repository_url:
+        return app.repository_url, snapshot, None
     if not app.repository_url:
+        return None, None, None
+    return app.repository_url, None, resolve_github_token(db, app)
+
+
+@router.get("/{app_id}/commits", response_model=CommitsResponse)
+async def get_app_commits(
+    app_id: UUID,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Recent commits from the app's linked repository, served from its snapshot."""
+    from ..services.repository import RepositoryService
+    from ..services.commit_prefetch import (
+        SNAPSHOT_COMMIT_LIMIT, schedule_snapshot_refresh, snapshot_is_stale
+    )
+
+    # All DB work happens in the threadpool; only upstream I/O runs on the loop
+    repository_url, snapshot, github_token = await run_in_threadpool(_load_commits_source, app_id, db)
+
+    if not repository_url:
         return CommitsResponse(
             commits=[],
             error="No repository URL configured"
         )
 
-    platform, owner, repo = RepositoryService.parse_repo_url(app.repository_url)
+    platform, owner, repo = RepositoryService.parse_repo_url(repository_url)
     if not platform or not owner or not repo:
         return CommitsResponse(
             commits=[],
             error="Invalid repository URL format. Supported: GitHub, GitLab"
         )
 
-    # Use app's GitHub token first (PAT provided by owner), then fall back to creator's OAuth token
-    github_token = app.github_token
-    if not github_token:
-        creator = db.query(User).filter(User.id == app.creator_id).first()
-        github_token = creator.github_access_token if creator else None
+    if snapshot is not None:
+        if snapshot_is_stale(snapshot):
+            schedule_snapshot_refresh(app_id)
+        return _commits_response(
+            snapshot.commits[:limit],
+            snapshot.repo_info,
+            snapshot.commits_error,
+            snapshot.repo_info_error
+        )
 
-    # Create service with token
+    # No snapshot yet (new app, or its repository changed): fetch live once
     repo_service = RepositoryService(github_token=github_token)
 
-    # Fetch commits and repo info
-    commits = await repo_service.get_recent_commits(app.repository_url, limit)
-    repo_info = await repo_service.get_repo_info(app.repository_url)
+    # Fetch commits and repo info concurrently under one shared deadline;
+    # whichever finishes in time is returned even if the other doesn't
+    commits_task = asyncio.create_task(repo_service.get_recent_commits(repository_url, SNAPSHOT_COMMIT_LIMIT))
+    repo_info_task = asyncio.create_task(repo_service.get_repo_info(repository_url))
+    done, pending = await asyncio.wait(
+        {commits_task, repo_info_task},
+        timeout=settings.repo_fetch_deadline_seconds
+    )
+    for task in pending:
+        task.cancel()
+
+    commits, commits_error = _task_outcome(commits_task, done, [], "No commits found")
+    repo_info, repo_info_error = _task_outcome(repo_info_task, done, None, "Repository info not available")
+
+    # Persist through the per-app refresh so there is one snapshot writer per
+    # app; it reads the upstream results just cached (or the shielded fetch
+    # still in flight) rather than calling upstream again
+    schedule_snapshot_refresh(app_id)
 
+    return _commits_response(commits[:limit], repo_info, commits_error, repo_info_error)
+
+
+def _commits_response(commits, repo_info, commits_error, repo_info_error) -> CommitsResponse:
     if not commits and not repo_info:
         return CommitsResponse(
             commits=[],
-            error="Repository not found or not accessible. Connect GitHub in Settings for private repos."
+            error="Repository not found or not accessible. Connect GitHub in Settings for private repos.",
+            commits_error=commits_error,
+            repo_info_error=repo_info_error
         )
 
     return CommitsResponse(
         commits=[CommitInfo(**c) for c in commits],
-        repo_info=RepoInfo(**repo_info) if repo_info else None
+        repo_info=RepoInfo(**repo_info) if repo_info else None,
+        commits_error=commits_error,
+        repo_info_error=repo_info_error
     )
 
 
+def _task_outcome(task: asyncio.Task, done: set, empty, empty_error: str):
+    """Return (result, error) for an upstream fetch started by get_app_commits."""
+    if task not in done:
+        return empty, "Timed out waiting for the repository host"
+    if task.exception() is not None:
+        return empty, "Failed to fetch from the repository host"
+    result = task.result()
+    if not result:
+        return empty, empty_error
+    return result, None
+
+
 @router.post("/{app_id}/github-token", status_code=status.HTTP_200_OK)
 def set_github_token(
     app_id: UUID,
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from datetime import timedelta
+from typing import Optional
+from uuid import UUID
 import re
 
 from ..database import get_db
 from ..models.user import User, UserRole
 from ..schemas.user import UserCreate, UserLogin, UserResponse, Token, ResetPasswordRequest
-from ..utils.security import verify_password, get_password_hash, create_access_token
+from ..utils.security import verify_password_async, get_password_hash_async, create_access_token
 from ..utils.dependencies import get_current_user
 from ..utils.oauth import oauth
 from ..config import settings
@@ -31,8 +34,7 @@ def generate_unique_username(email: str, db: Session) -> str:
     return username
 
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+def _check_registration_available(user_data: UserCreate, db: Session):
     # Check if username already exists
     if db.query(User).filter(User.username == user_data.username).first():
         raise HTTPException(
@@ -46,9 +48,22 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
+
+
+def _save_user(db_user: User, db: Session) -> User:
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+    # DB work runs in the threadpool; bcrypt runs on the password hash pool
+    await run_in_threadpool(_check_registration_available, user_data, db)
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -56,19 +71,20 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         full_name=user_data.full_name,
         role=UserRole.developer  # Default role for new users
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return await run_in_threadpool(_save_user, db_user, db)
 
 
-@router.post("/login", response_model=Token)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+def _find_login_user(login: str, db: Session) -> Optional[User]:
     # Allow login with username or email
-    user = db.query(User).filter(
-        (User.username == credentials.username) | (User.email == credentials.username)
+    return db.query(User).filter(
+        (User.username == login) | (User.email == login)
     ).first()
 
+
+@router.post("/login", response_model=Token)
+async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_login_user, credentials.username, db)
+
     # Check if user exists
     if not user:
         raise HTTPException(
@@ -86,7 +102,7 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
         )
 
     # Verify password
-    if not verify_password(credentials.password, user.password_hash):
+    if not await verify_password_async(credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username/email or password",
@@ -116,41 +132,12 @@ def refresh_token(current_user: User = Depends(get_current_user)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-# Google OAuth endpoints
-@router.get("/google/login")
-async def google_login(request: Request):
-    """Redirect to Google OAuth login."""
-    if not settings.google_client_id:
-        raise HTTPException(
-            status_code=status.HTTP_501_NOT_IMPLEMENTED,
-            detail="Google OAuth is not configured"
-        )
-    redirect_uri = settings.google_redirect_uri
-    return await oauth.google.authorize_redirect(request, redirect_uri)
-
-
-@router.get("/google/callback")
-async def google_callback(request: Request, db: Session = Depends(get_db)):
-    """Handle Google OAuth callback."""
-    if not settings.google_client_id:
-        raise HTTPException(
-            status_code=status.HTTP_501_NOT_IMPLEMENTED,
-            detail="Google OAuth is not configured"
-        )
-
-    try:
-        token = await oauth.google.authorize_access_token(request)
-    except Exception as e:
-        return RedirectResponse(
-            url=f"{settings.frontend_url}/login?error=oauth_failed"
-        )
-
-    user_info = token.get('userinfo')
-    if not user_info:
-        return RedirectResponse(
-            url=f"{settings.frontend_url}/login?error=oauth_failed"
-        )
-
+def _get_or_create_google_user_id(user_info: dict, db: Session) -> Optional[UUID]:
+    """
+    Find or create the user for a Google sign-in, linking Google to an
+    existing password account with the same email, and return its id.
+    Returns None when that email already belongs to another OAuth account.
+    """
     google_id = user_info.get('sub')
     email = user_info.get('email')
 
@@ -171,9 +158,7 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
                 db.commit()
                 user = existing_user
             else:
-                return RedirectResponse(
-                    url=f"{settings.frontend_url}/login?error=email_exists"
-                )
+                return None
         else:
             # Create new user
             user = User(
@@ -191,10 +176,54 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
             db.commit()
             db.refresh(user)
 
+    return user.id
+
+
+# Google OAuth endpoints
+@router.get("/google/login")
+async def google_login(request: Request):
+    """Redirect to Google OAuth login."""
+    if not settings.google_client_id:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Google OAuth is not configured"
+        )
+    redirect_uri = settings.google_redirect_uri
+    return await oauth.google.authorize_redirect(request, redirect_uri)
+
+
+@router.get("/google/callback")
+async def google_callback(request: Request, db: Session = Depends(get_db)):
+    """Handle Google OAuth callback."""
+    if not settings.google_client_id:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Google OAuth is not configured"
+        )
+
+    try:
+        token = await oauth.google.authorize_access_token(request)
+    except Exception as e:
+        return RedirectResponse(
+            url=f"{settings.frontend_url}/login?error=oauth_failed"
+        )
+
+    user_info = token.get('userinfo')
+    if not user_info:
+        return RedirectResponse(
+            url=f"{settings.frontend_url}/login?error=oauth_failed"
+        )
+
+    user_id = await run_in_threadpool(_get_or_create_google_user_id, user_info, db)
+    if user_id is None:
+        return RedirectResponse(
+            url=f"{settings.frontend_url}/login?error=email_exists"
+        )
+
     # Generate JWT token
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": str(user.id)},
+        data={"sub": str(user_id)},
         expires_delta=access_token_expires
     )
 
@@ -206,7 +235,7 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
 
 # GitHub OAuth endpoints (for connecting GitHub to access private repos)
 @router.get("/github/connect")
-async def github_connect(
+def github_connect(
     request: Request,
     token: str = None,
     db: Session = Depends(get_db)
@@ -216,7 +245,6 @@ async def github_connect(
     Accepts token as query parameter since this is accessed via direct link.
     """
     from ..utils.security import decode_access_token
-    from uuid import UUID
 
     if not settings.github_client_id:
         raise HTTPException(
@@ -266,6 +294,19 @@ async def github_connect(
     return RedirectResponse(url=github_auth_url)
 
 
+def _save_github_connection(user_id: str, access_token: str, github_username: Optional[str], db: Session) -> bool:
+    """Store the GitHub token on the user named by the OAuth state; False if not found."""
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        return False
+
+    # Update user with GitHub token
+    user.github_access_token = access_token
+    user.github_username = github_username
+    db.commit()
+    return True
+
+
 @router.get("/github/callback")
 async def github_callback(
     request: Request,
@@ -325,18 +366,11 @@ async def github_callback(
 
         github_username = github_user.get("login")
 
-        # Find user by state (user_id)
-        user = db.query(User).filter(User.id == state).first()
-        if not user:
+        if not await run_in_threadpool(_save_github_connection, state, access_token, github_username, db):
             return RedirectResponse(
                 url=f"{settings.frontend_url}/settings?error=user_not_found"
             )
 
-        # Update user with GitHub token
-        user.github_access_token = access_token
-        user.github_username = github_username
-        db.commit()
-
         return RedirectResponse(
             url=f"{settings.frontend_url}/settings?github=connected"
         )
@@ -349,7 +383,7 @@ async def github_callback(
 
 
 @router.post("/github/disconnect")
-async def github_disconnect(
+def github_disconnect(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -370,10 +404,19 @@ async def github_status(current_user: User = Depends(get_current_user)):
 
 
 # Password Reset endpoint (simplified for testing - no email verification)
+def _find_user_by_email(email: str, db: Session) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+
+def _set_password_hash(user: User, password_hash: str, db: Session):
+    user.password_hash = password_hash
+    db.commit()
+
+
 @router.post("/reset-password")
-def reset_password(request_data: ResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password(request_data: ResetPasswordRequest, db: Session = Depends(get_db)):
     """Reset password directly with email and new password."""
-    user = db.query(User).filter(User.email == request_data.email).first()
+    user = await run_in_threadpool(_find_user_by_email, request_data.email, db)
 
     if not user:
         raise HTTPException(
@@ -396,7 +439,7 @@ def reset_password(request_data: ResetPasswordRequest, db: Session = Depends(get
         )
 
     # Update password
-    user.password_hash = get_password_hash(request_data.new_password)
-    db.commit()
+    password_hash = await get_password_hash_async(request_data.new_password)
+    await run_in_threadpool(_set_password_hash, user, password_hash, db)
 
     return {"message": "Password has been reset successfully"}
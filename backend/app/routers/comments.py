@@ -8,6 +8,7 @@ from ..models.app import App
 from ..models.comment import Comment
 from ..models.user import User
 from ..schemas.comment import CommentCreate, CommentUpdate, CommentResponse
+from ..services.counters import adjust_comment_count
 from ..utils.dependencies import get_current_user
 
 router = APIRouter(prefix="/api/apps", tags=["comments"])
@@ -97,6 +98,7 @@ def create_comment(
         parent_comment_id=comment_data.parent_comment_id
     )
     db.add(comment)
+    adjust_comment_count(db, app_id, 1)
     db.commit()
     db.refresh(comment)
     return comment
@@ -147,6 +149,7 @@ def delete_comment(
             detail="Not authorized to delete this comment"
         )
     
+    adjust_comment_count(db, comment.app_id, -1)
     db.delete(comment)
     db.commit()
     return None
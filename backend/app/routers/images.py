@@ -1,25 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Tuple
 from uuid import UUID
 
 from ..database import get_db
 from ..models.app import App
 from ..models.image import Image
-from ..schemas.app import ImageResponse
+from ..schemas.app import ImageResponse, DirectUploadRequest, DirectUploadResponse, FinalizeUploadRequest
 from ..utils.dependencies import get_current_user
-from ..services.upload import save_upload_file, delete_upload_file
+from ..services.upload import (
+    SavedUpload, save_upload_file, delete_upload_file, create_direct_upload, finalize_direct_upload,
+    blob_lock, publish_upload, discard_upload
+)
+from ..services.image_variants import schedule_image_variants
 
 router = APIRouter(prefix="/api/apps", tags=["images"])
 
 
-@router.post("/{app_id}/images", response_model=ImageResponse, status_code=status.HTTP_201_CREATED)
-async def upload_image(
-    app_id: UUID,
-    file: UploadFile = File(...),
-    is_featured: bool = False,
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def _check_can_upload(app_id: UUID, current_user, db: Session):
     app = db.query(App).filter(App.id == app_id).first()
     if not app:
         raise HTTPException(
@@ -32,28 +31,103 @@ async def upload_image(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to upload images for this app"
         )
+
+
+def _create_image(app_id: UUID, saved: SavedUpload, is_featured: bool, db: Session) -> Tuple[ImageResponse, bool]:
+    """
+    Store the blob and insert the image row; returns (response, whether
+    derivatives still need generating). Both happen under the blob's lock
+    so a concurrent delete of the same content can't remove it in between.
+    """
+    with blob_lock(db, saved.url):
+        publish_upload(saved)
+
+        # Get max order_index
+        max_order = db.query(Image.order_index).filter(Image.app_id == app_id).order_by(Image.order_index.desc()).first()
+        order_index = (max_order[0] + 1) if max_order else 0
+
+        # If this is featured, unset other featured images
+        if is_featured:
+            db.query(Image).filter(Image.app_id == app_id).update({"is_featured": False})
+
+        # Same content already uploaded: share its blob and derivatives. If they
+        # are still being generated (or failed), this row gets them when they land
+        existing = db.query(Image.variants).filter(
+            Image.image_url == saved.url, Image.variants.isnot(None)
+        ).first()
+        needs_variants = existing is None or existing.variants is None
+
+        # Create image record
+        image = Image(
+            app_id=app_id,
+            image_url=saved.url,
+            is_featured=is_featured,
+            order_index=order_index,
+            variants=None if needs_variants else existing.variants
+        )
+        db.add(image)
+        db.commit()
+    db.refresh(image)
+    return ImageResponse.model_validate(image), needs_variants
+
+
+@router.post("/{app_id}/images", response_model=ImageResponse, status_code=status.HTTP_201_CREATED)
+async def upload_image(
+    app_id: UUID,
+    file: UploadFile = File(...),
+    is_featured: bool = False,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # Sync DB work runs in the threadpool so uploads never block the event loop
+    await run_in_threadpool(_check_can_upload, app_id, current_user, db)
     
     # Save file
-    image_url = await save_upload_file(file)
-    
-    # Get max order_index
-    max_order = db.query(Image.order_index).filter(Image.app_id == app_id).order_by(Image.order_index.desc()).first()
-    order_index = (max_order[0] + 1) if max_order else 0
-    
-    # If this is featured, unset other featured images
-    if is_featured:
-        db.query(Image).filter(Image.app_id == app_id).update({"is_featured": False})
-    
-    # Create image record
-    image = Image(
-        app_id=app_id,
-        image_url=image_url,
-        is_featured=is_featured,
-        order_index=order_index
-    )
-    db.add(image)
-    db.commit()
-    db.refresh(image)
+    saved = await save_upload_file(file)
+    try:
+        image, needs_variants = await run_in_threadpool(_create_image, app_id, saved, is_featured, db)
+    finally:
+        await run_in_threadpool(discard_upload, saved)
+
+    # Thumbnails/WebP are made in the background; srcset fills in once done
+    if needs_variants:
+        schedule_image_variants(image.id, image.image_url)
+    return image
+
+
+@router.post("/{app_id}/images/direct-upload", response_model=DirectUploadResponse)
+def start_direct_upload(
+    app_id: UUID,
+    request: DirectUploadRequest,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Presign an upload straight to object storage, so the file bytes never
+    pass through the API. PUT the file as described, then call finalize.
+    Answers 501 on storage backends without direct uploads (use the
+    multipart endpoint instead).
+    """
+    _check_can_upload(app_id, current_user, db)
+    return create_direct_upload(request.sha256, request.content_type, request.size)
+
+
+@router.post("/{app_id}/images/finalize", response_model=ImageResponse, status_code=status.HTTP_201_CREATED)
+async def finalize_upload(
+    app_id: UUID,
+    request: FinalizeUploadRequest,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    await run_in_threadpool(_check_can_upload, app_id, current_user, db)
+
+    saved = await run_in_threadpool(finalize_direct_upload, request.sha256, request.content_type)
+    try:
+        image, needs_variants = await run_in_threadpool(_create_image, app_id, saved, request.is_featured, db)
+    finally:
+        await run_in_threadpool(discard_upload, saved)
+    if needs_variants:
+        schedule_image_variants(image.id, image.image_url)
     return image
 
 
@@ -77,9 +151,10 @@ def delete_image(
             detail="Not authorized to delete this image"
         )
     
-    # Delete file
-    delete_upload_file(image.image_url)
-    
+    image_url, variants = image.image_url, image.variants
     db.delete(image)
     db.commit()
+
+    # Delete file and its derivatives unless another image shares them
+    delete_upload_file(image_url, db, variants)
     return None
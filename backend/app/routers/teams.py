@@ -14,8 +14,10 @@ from ..schemas.team import (
     TeamInvitationCreate, TeamInvitationResponse, OwnerInfo
 )
 from ..utils.dependencies import get_current_user
+from ..utils.fast_json import ResponseSerializer
 
 router = APIRouter(prefix="/api/teams", tags=["teams"])
+team_list_serializer = ResponseSerializer(List[TeamListItem])
 
 
 # Helper function to check team access
@@ -103,7 +105,8 @@ def get_teams(
                 "invitation_id": invitation_id
             })
         
-        return result
+        # Built in the exact TeamListItem shape: skip re-validation
+        return team_list_serializer.respond(result, trusted=True)
     else:
         # Get all teams (for admin or public listing)
         teams = db.query(Team).options(joinedload(Team.apps)).order_by(Team.updated_at.desc()).all()
@@ -123,9 +126,10 @@ def get_teams(
                 },
                 "member_count": len(team.members),
                 "app_count": len(team.apps),
-                "invitation_status": None
+                "invitation_status": None,
+                "invitation_id": None
             })
-        return result
+        return team_list_serializer.respond(result, trusted=True)
 
 
 @router.get("/{team_id}", response_model=TeamResponse)
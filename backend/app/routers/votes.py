@@ -8,6 +8,7 @@ from ..models.app import App
 from ..models.vote import Vote, VoteType
 from ..models.user import User
 from ..schemas.vote import VoteCreate, VoteResponse, VoteStats
+from ..services.counters import adjust_vote_counters
 from ..utils.dependencies import get_current_user
 
 router = APIRouter(prefix="/api/apps", tags=["votes"])
@@ -27,14 +28,15 @@ def vote_app(
             detail="App not found"
         )
     
-    # Check if user already voted
+    # Check if user already voted (locked so a concurrent flip can't skew the counters)
     existing_vote = db.query(Vote).filter(
         Vote.app_id == app_id,
         Vote.user_id == current_user.id
-    ).first()
+    ).with_for_update().first()
     
     if existing_vote:
-        # Update existing vote
+        # Update existing vote, moving it between counters if the type flipped
+        adjust_vote_counters(db, app_id, existing_vote.vote_type, vote_data.vote_type)
         existing_vote.vote_type = vote_data.vote_type
         db.commit()
         db.refresh(existing_vote)
@@ -47,6 +49,7 @@ def vote_app(
             vote_type=vote_data.vote_type
         )
         db.add(vote)
+        adjust_vote_counters(db, app_id, None, vote_data.vote_type)
         db.commit()
         db.refresh(vote)
         return vote
@@ -61,9 +64,10 @@ def remove_vote(
     vote = db.query(Vote).filter(
         Vote.app_id == app_id,
         Vote.user_id == current_user.id
-    ).first()
+    ).with_for_update().first()
     
     if vote:
+        adjust_vote_counters(db, app_id, vote.vote_type, None)
         db.delete(vote)
         db.commit()
     
@@ -83,8 +87,8 @@ def get_vote_stats(
             detail="App not found"
         )
     
-    upvotes = db.query(Vote).filter(Vote.app_id == app_id, Vote.vote_type == VoteType.upvote).count()
-    downvotes = db.query(Vote).filter(Vote.app_id == app_id, Vote.vote_type == VoteType.downvote).count()
+    upvotes = app.upvotes
+    downvotes = app.downvotes
     
     user_vote = db.query(Vote).filter(
         Vote.app_id == app_id,
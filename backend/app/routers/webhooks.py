@@ -0,0 +1,122 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
+from uuid import UUID
+import hashlib
+import hmac
+import json
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.app import App
+from ..services.commit_prefetch import schedule_snapshot_refresh
+from ..services.repository import RepositoryService
+
+router = APIRouter(prefix="/api/webhooks", tags=["webhooks"])
+
+webhook_stats = {
+    "received": 0,
+    "rejected": 0,
+    "apps_refreshed": 0,
+}
+
+
+def _reject(detail: str):
+    webhook_stats["rejected"] += 1
+    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+def _require_secret(secret: str) -> str:
+    if not secret:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Webhook not configured"
+        )
+    return secret
+
+
+def _parse_payload(body: bytes) -> dict:
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
+
+def _find_apps_for_repository(repository_url: str) -> List[Tuple[UUID, str]]:
+    """(id, repository_url) of apps whose repository_url points at the same repository."""
+    platform, owner, repo = RepositoryService.parse_repo_url(repository_url)
+    if not platform or not owner or not repo:
+        return []
+    target = (platform, owner.lower(), repo.lower())
+
+    db = SessionLocal()
+    try:
+        candidates = db.query(App.id, App.repository_url).filter(
+            App.repository_url.ilike(f"%{repo}%")
+        ).all()
+    finally:
+        db.close()
+
+    matches = []
+    for app_id, url in candidates:
+        candidate_platform, candidate_owner, candidate_repo = RepositoryService.parse_repo_url(url)
+        if candidate_platform and (candidate_platform, candidate_owner.lower(), candidate_repo.lower()) == target:
+            matches.append((app_id, url))
+    return matches
+
+
+async def _handle_push(repository_url: Optional[str]) -> dict:
+    """Invalidate the repo's cached data and refresh the snapshots of its apps."""
+    if not repository_url:
+        raise HTTPException(status_code=400, detail="Payload has no repository URL")
+
+    matches = await run_in_threadpool(_find_apps_for_repository, repository_url)
+    for url in {url for _, url in matches}:
+        await RepositoryService.invalidate(url)
+    for app_id, _ in matches:
+        schedule_snapshot_refresh(app_id, background=False)
+
+    webhook_stats["apps_refreshed"] += len(matches)
+    return {"message": "Refresh scheduled", "apps": len(matches)}
+
+
+@router.post("/github")
+async def github_webhook(request: Request):
+    """Receive GitHub push events (signed with X-Hub-Signature-256)."""
+    secret = _require_secret(settings.github_webhook_secret)
+    body = await request.body()
+    webhook_stats["received"] += 1
+
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    signature = request.headers.get("X-Hub-Signature-256", "")
+    # Compare bytes: compare_digest raises TypeError on non-ASCII str
+    if not hmac.compare_digest(expected.encode("utf-8"), signature.encode("utf-8")):
+        _reject("Invalid webhook signature")
+
+    event = request.headers.get("X-GitHub-Event", "")
+    if event == "ping":
+        return {"message": "pong"}
+    if event != "push":
+        return {"message": f"Ignored event: {event}"}
+
+    payload = _parse_payload(body)
+    return await _handle_push((payload.get("repository") or {}).get("html_url"))
+
+
+@router.post("/gitlab")
+async def gitlab_webhook(request: Request):
+    """Receive GitLab push events (authenticated with X-Gitlab-Token)."""
+    secret = _require_secret(settings.gitlab_webhook_secret)
+    body = await request.body()
+    webhook_stats["received"] += 1
+
+    token = request.headers.get("X-Gitlab-Token", "")
+    if not hmac.compare_digest(secret.encode("utf-8"), token.encode("utf-8")):
+        _reject("Invalid webhook token")
+
+    event = request.headers.get("X-Gitlab-Event", "")
+    if event != "Push Hook":
+        return {"message": f"Ignored event: {event}"}
+
+    payload = _parse_payload(body)
+    return await _handle_push((payload.get("project") or {}).get("web_url"))
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from uuid import UUID
 from ..models.app import AppStatus, ProgressMode
@@ -28,11 +28,34 @@ class ImageResponse(ImageBase):
     id: UUID
     app_id: UUID
     created_at: datetime
+    srcset: Dict[str, str] = {}
 
     class Config:
         from_attributes = True
 
 
+class DirectUploadRequest(BaseModel):
+    sha256: str  # lowercase hex digest of the file
+    content_type: str
+    size: int
+
+
+class PresignedUpload(BaseModel):
+    method: str
+    url: str
+    headers: Dict[str, str]
+
+
+class DirectUploadResponse(BaseModel):
+    upload: Optional[PresignedUpload] = None  # None: already stored, finalize right away
+
+
+class FinalizeUploadRequest(BaseModel):
+    sha256: str
+    content_type: str
+    is_featured: bool = False
+
+
 class TagBase(BaseModel):
     name: str
 
@@ -114,6 +137,8 @@ class AppResponse(AppBase):
     downvotes: Optional[int] = None
     total_votes: Optional[int] = None
     comment_count: Optional[int] = None
+    task_count: Optional[int] = None
+    completed_task_count: Optional[int] = None
     creator: Optional[CreatorInfo] = None
     has_github_token: bool = False
 
@@ -132,6 +157,8 @@ class AppListItem(AppBase):
     images: List[ImageResponse] = []
     vote_count: Optional[int] = None
     comment_count: Optional[int] = None
+    task_count: Optional[int] = None
+    completed_task_count: Optional[int] = None
     creator: Optional[CreatorInfo] = None
 
     class Config:
@@ -165,3 +192,6 @@ class CommitsResponse(BaseModel):
     commits: List[CommitInfo] = []
     repo_info: Optional[RepoInfo] = None
     error: Optional[str] = None
+    # Per-field failures, so one half can be shown when the other fails
+    commits_error: Optional[str] = None
+    repo_info_error: Optional[str] = None
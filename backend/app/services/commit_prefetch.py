@@ -0,0 +1,271 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import case, text
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..database import SessionLocal, engine
+from ..models.app import App
+from ..models.user import User
+from ..models.repository_snapshot import RepositorySnapshot
+from .repository import RepositoryService
+
+# Snapshots always hold the most commits get_app_commits can ask for
+SNAPSHOT_COMMIT_LIMIT = 50
+
+# app_id -> running refresh, so views and the prefetcher never double up
+_refreshing: Dict[UUID, asyncio.Task] = {}
+
+# Postgres advisory lock key (arbitrary, app-wide) electing the one worker
+# process that runs the prefetcher; the others retry every LEADER_RETRY_SECONDS
+PREFETCH_LOCK_KEY = 7240115301
+LEADER_RETRY_SECONDS = 60
+
+
+def resolve_github_token(db, app: App) -> Optional[str]:
+    """App's own PAT first, then the creator's OAuth token."""
+    if app.github_token:
+        return app.github_token
+    creator = db.query(User).filter(User.id == app.creator_id).first()
+    return creator.github_access_token if creator else None
+
+
+def snapshot_is_stale(snapshot: RepositorySnapshot) -> bool:
+    max_age = timedelta(seconds=settings.repo_snapshot_max_age_seconds)
+    return datetime.utcnow() - snapshot.fetched_at > max_age
+
+
+def _upsert_snapshot(db, values: Dict[str, Any], commits_failed: bool, repo_info_failed: bool):
+    """
+    INSERT ... ON CONFLICT (app_id) DO UPDATE, so concurrent writers (two
+    workers, a view racing the prefetcher) can't collide on the primary key.
+    A field whose fetch failed (as opposed to coming back empty) keeps the
+    previous value for the same repository; if both failed, fetched_at
+    stays too so it is retried soon.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Repository snapshots are not supported on {dialect}")
+
+    table = RepositorySnapshot.__table__
+    statement = insert(table).values(**values)
+    new = statement.excluded
+    same_repository = table.c.repository_url == new.repository_url
+
+    def keep_if(failed: bool, column: str):
+        if not failed:
+            return new[column]
+        return case((same_repository, table.c[column]), else_=new[column])
+
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.app_id],
+        set_={
+            "repository_url": new.repository_url,
+            "commits": keep_if(commits_failed, "commits"),
+            "commits_error": keep_if(commits_failed, "commits_error"),
+            "repo_info": keep_if(repo_info_failed, "repo_info"),
+            "repo_info_error": keep_if(repo_info_failed, "repo_info_error"),
+            "fetched_at": keep_if(commits_failed and repo_info_failed, "fetched_at"),
+        }
+    ))
+
+
+def save_snapshot(
+    app_id: UUID,
+    repository_url: str,
+    commits: List[Dict[str, Any]],
+    repo_info: Optional[Dict[str, Any]],
+    commits_error: Optional[str],
+    repo_info_error: Optional[str],
+    commits_failed: bool = False,
+    repo_info_failed: bool = False
+):
+    """
+    Upsert an app's snapshot. *_failed marks a fetch that failed outright
+    (network, 5xx, rate limit), so the previous value is kept instead.
+    Runs in a worker thread with its own session.
+    """
+    db = SessionLocal()
+    try:
+        app = db.query(App).filter(App.id == app_id).first()
+        if not app or app.repository_url != repository_url:
+            return  # App deleted or repo changed while we were fetching
+
+        _upsert_snapshot(db, {
+            "app_id": app_id,
+            "repository_url": repository_url,
+            "commits": commits,
+            "repo_info": repo_info,
+            "commits_error": commits_error,
+            "repo_info_error": repo_info_error,
+            "fetched_at": datetime.utcnow(),
+        }, commits_failed, repo_info_failed)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _load_refresh_target(app_id: UUID) -> Optional[Tuple[str, Optional[str]]]:
+    db = SessionLocal()
+    try:
+        app = db.query(App).filter(App.id == app_id).first()
+        if not app or not app.repository_url:
+            return None
+        return app.repository_url, resolve_github_token(db, app)
+    finally:
+        db.close()
+
+
+def _apps_with_repositories() -> List[UUID]:
+    db = SessionLocal()
+    try:
+        rows = db.query(App.id).filter(App.repository_url.isnot(None), App.repository_url != "").all()
+        return [row.id for row in rows]
+    finally:
+        db.close()
+
+
+async def refresh_app_snapshot(app_id: UUID, background: bool = True):
+    """Fetch commits and repo info for one app and persist them."""
+    target = await run_in_threadpool(_load_refresh_target, app_id)
+    if target is None:
+        return
+    repository_url, github_token = target
+
+    platform, owner, repo = RepositoryService.parse_repo_url(repository_url)
+    if not platform or not owner or not repo:
+        return
+
+    service = RepositoryService(github_token=github_token, background=background)
+    commits, repo_info = await asyncio.gather(
+        service.fetch_recent_commits(repository_url, SNAPSHOT_COMMIT_LIMIT),
+        service.fetch_repo_info(repository_url),
+        return_exceptions=True
+    )
+    # An exception means the fetch failed; an empty result is a real answer
+    # (empty, deleted or inaccessible repository) and replaces the snapshot
+    commits_failed = isinstance(commits, Exception)
+    repo_info_failed = isinstance(repo_info, Exception)
+    if commits_failed:
+        commits = []
+    if repo_info_failed:
+        repo_info = None
+    await run_in_threadpool(
+        save_snapshot,
+        app_id,
+        repository_url,
+        commits,
+        repo_info,
+        None if commits else "No commits found",
+        None if repo_info else "Repository info not available",
+        commits_failed,
+        repo_info_failed
+    )
+
+
+def schedule_snapshot_refresh(app_id: UUID, background: bool = True) -> asyncio.Task:
+    """Start (or join) the refresh for app_id."""
+    task = _refreshing.get(app_id)
+    if task is not None:
+        return task
+
+    async def run():
+        try:
+            await refresh_app_snapshot(app_id, background)
+        except Exception as e:
+            print(f"[Commit Prefetch] Refresh failed for app {app_id}: {e}")
+
+    task = asyncio.create_task(run())
+    _refreshing[app_id] = task
+    task.add_done_callback(lambda _: _refreshing.pop(app_id, None))
+    return task
+
+
+class LeaderLock:
+    """
+    Session-level Postgres advisory lock held on a dedicated connection, so
+    only one process runs a background loop. The lock goes away with its
+    connection, so if the holder dies another worker takes over. Other
+    databases are single-process setups and always hold it.
+    """
+
+    def __init__(self, key: int):
+        self.key = key
+        self._connection = None
+
+    def acquire(self) -> bool:
+        """Take (or confirm we still hold) the lock. Blocking; run in the threadpool."""
+        if engine.dialect.name != "postgresql":
+            return True
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT 1"))
+                self._connection.commit()
+                return True
+            except Exception:
+                self.release()  # connection lost, and the lock with it
+
+        connection = engine.connect()
+        try:
+            locked = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar()
+            connection.commit()  # don't sit idle in a transaction; the lock outlives it
+        except Exception:
+            connection.close()
+            raise
+        if not locked:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def release(self):
+        if self._connection is not None:
+            # Drop the DBAPI connection rather than pooling it with the lock still held
+            self._connection.invalidate()
+            self._connection.close()
+            self._connection = None
+
+
+async def run_commit_prefetcher(interval_minutes: int):
+    """
+    Background loop: refresh every app with a repository_url once per
+    interval. Apps are spread across the interval with random jitter so
+    upstream sees a steady trickle rather than a burst. Only the worker
+    holding the prefetch lock runs it, so upstream traffic doesn't scale
+    with the number of workers.
+    """
+    interval = interval_minutes * 60
+    lock = LeaderLock(PREFETCH_LOCK_KEY)
+    while True:
+        try:
+            is_leader = await run_in_threadpool(lock.acquire)
+        except Exception as e:
+            print(f"[Commit Prefetch] Could not take the prefetch lock: {e}")
+            is_leader = False
+        if not is_leader:
+            await asyncio.sleep(min(interval, LEADER_RETRY_SECONDS))
+            continue
+
+        try:
+            app_ids = await run_in_threadpool(_apps_with_repositories)
+        except Exception as e:
+            print(f"[Commit Prefetch] Could not list apps: {e}")
+            app_ids = []
+
+        if not app_ids:
+            await asyncio.sleep(interval)
+            continue
+
+        random.shuffle(app_ids)
+        spacing = interval / len(app_ids)
+        for app_id in app_ids:
+            await asyncio.sleep(spacing * random.uniform(0.5, 1.5))
+            await schedule_snapshot_refresh(app_id)
+        print(f"[Commit Prefetch] Refreshed {len(app_ids)} repository snapshots")
@@ -0,0 +1,200 @@
+from typing import Optional, List
+from uuid import UUID
+from sqlalchemy import func, case, bindparam, or_, and_
+from sqlalchemy.orm import Session
+
+from ..models.app import App, AppTask, ProgressMode
+from ..models.vote import Vote, VoteType
+from ..models.comment import Comment
+from .ranking import refresh_app_scores
+
+
+def _vote_column(vote_type: VoteType):
+    return App.upvotes if vote_type == VoteType.upvote else App.downvotes
+
+
+def _update_counters(db: Session, app_id: UUID, values: dict):
+    # Keep updated_at as-is: a vote or comment is not an edit of the app
+    values[App.updated_at] = App.updated_at
+    db.query(App).filter(App.id == app_id).update(values, synchronize_session=False)
+
+
+def adjust_vote_counters(
+    db: Session,
+    app_id: UUID,
+    old_type: Optional[VoteType],
+    new_type: Optional[VoteType]
+):
+    """
+    Move one vote from old_type to new_type on the app's counters and
+    refresh its ranking scores.
+    Pass old_type=None for a new vote and new_type=None for a removed one.
+    Runs in the caller's transaction; the caller commits.
+    """
+    if old_type == new_type:
+        return
+
+    values = {}
+    if old_type is not None:
+        column = _vote_column(old_type)
+        values[column] = column - 1
+    if new_type is not None:
+        column = _vote_column(new_type)
+        values[column] = column + 1
+    _update_counters(db, app_id, values)
+    refresh_app_scores(db, [app_id])
+
+
+def adjust_comment_count(db: Session, app_id: UUID, delta: int):
+    """Add delta to the app's comment counter in the caller's transaction."""
+    _update_counters(db, app_id, {App.comment_count: App.comment_count + delta})
+
+
+def task_progress(completed: int, total: int) -> int:
+    """Auto-mode progress: percentage of completed tasks."""
+    return completed * 100 // total if total > 0 else 0
+
+
+def adjust_task_counters(db: Session, app_id: UUID, total_delta: int, completed_delta: int):
+    """
+    Add the deltas to the app's task counters and, for apps in auto
+    progress mode, recompute progress from the new counts in the same
+    statement. Runs in the caller's transaction; the caller commits.
+    """
+    if not total_delta and not completed_delta:
+        return
+
+    total = App.task_count + total_delta
+    completed = App.completed_task_count + completed_delta
+    _update_counters(db, app_id, {
+        App.task_count: total,
+        App.completed_task_count: completed,
+        App.progress: case(
+            (
+                App.progress_mode == ProgressMode.auto,
+                case((total > 0, completed * 100 // total), else_=0)
+            ),
+            else_=App.progress
+        )
+    })
+
+
+def recount_task_counters(db: Session, app_ids: Optional[List[UUID]] = None) -> int:
+    """
+    Recompute task counters from the app_tasks table, and progress for apps
+    in auto mode, fixing every app that has drifted.
+    Returns the number of apps that were corrected; the caller commits.
+    """
+    task_counts = db.query(
+        AppTask.app_id.label("app_id"),
+        func.count(AppTask.id).label("task_count"),
+        func.sum(case((AppTask.is_completed == True, 1), else_=0)).label("completed_task_count")
+    ).group_by(AppTask.app_id).subquery()
+
+    actual_total = func.coalesce(task_counts.c.task_count, 0)
+    actual_completed = func.coalesce(task_counts.c.completed_task_count, 0)
+    auto_progress = case((actual_total > 0, actual_completed * 100 // actual_total), else_=0)
+
+    query = db.query(
+        App.id, App.progress_mode, App.progress, actual_total, actual_completed
+    ).outerjoin(
+        task_counts, task_counts.c.app_id == App.id
+    ).filter(
+        or_(
+            App.task_count != actual_total,
+            App.completed_task_count != actual_completed,
+            and_(App.progress_mode == ProgressMode.auto, App.progress != auto_progress)
+        )
+    )
+    if app_ids is not None:
+        query = query.filter(App.id.in_(app_ids))
+
+    drifted = [
+        {
+            "b_id": app_id,
+            "b_task_count": int(total),
+            "b_completed_task_count": int(completed),
+            "b_progress": task_progress(int(completed), int(total)) if mode == ProgressMode.auto else progress
+        }
+        for app_id, mode, progress, total, completed in query.all()
+    ]
+    if not drifted:
+        return 0
+
+    apps = App.__table__
+    db.execute(
+        apps.update()
+        .where(apps.c.id == bindparam("b_id"))
+        .values(
+            task_count=bindparam("b_task_count"),
+            completed_task_count=bindparam("b_completed_task_count"),
+            progress=bindparam("b_progress"),
+            updated_at=apps.c.updated_at
+        ),
+        drifted
+    )
+    return len(drifted)
+
+
+def recount_app_counters(db: Session, app_ids: Optional[List[UUID]] = None) -> int:
+    """
+    Recompute vote and comment counters from the votes and comments tables
+    and fix every app whose stored counters have drifted.
+    Returns the number of apps that were corrected; the caller commits.
+    """
+    vote_counts = db.query(
+        Vote.app_id.label("app_id"),
+        func.sum(case((Vote.vote_type == VoteType.upvote, 1), else_=0)).label("upvotes"),
+        func.sum(case((Vote.vote_type == VoteType.downvote, 1), else_=0)).label("downvotes")
+    ).group_by(Vote.app_id).subquery()
+    comment_counts = db.query(
+        Comment.app_id.label("app_id"),
+        func.count(Comment.id).label("comment_count")
+    ).group_by(Comment.app_id).subquery()
+
+    actual_upvotes = func.coalesce(vote_counts.c.upvotes, 0)
+    actual_downvotes = func.coalesce(vote_counts.c.downvotes, 0)
+    actual_comments = func.coalesce(comment_counts.c.comment_count, 0)
+
+    query = db.query(
+        App.id, actual_upvotes, actual_downvotes, actual_comments
+    ).outerjoin(
+        vote_counts, vote_counts.c.app_id == App.id
+    ).outerjoin(
+        comment_counts, comment_counts.c.app_id == App.id
+    ).filter(
+        or_(
+            App.upvotes != actual_upvotes,
+            App.downvotes != actual_downvotes,
+            App.comment_count != actual_comments
+        )
+    )
+    if app_ids is not None:
+        query = query.filter(App.id.in_(app_ids))
+
+    drifted = [
+        {
+            "b_id": app_id,
+            "b_upvotes": int(upvotes),
+            "b_downvotes": int(downvotes),
+            "b_comment_count": int(comment_count)
+        }
+        for app_id, upvotes, downvotes, comment_count in query.all()
+    ]
+    if not drifted:
+        return 0
+
+    apps = App.__table__
+    db.execute(
+        apps.update()
+        .where(apps.c.id == bindparam("b_id"))
+        .values(
+            upvotes=bindparam("b_upvotes"),
+            downvotes=bindparam("b_downvotes"),
+            comment_count=bindparam("b_comment_count"),
+            updated_at=apps.c.updated_at
+        ),
+        drifted
+    )
+    refresh_app_scores(db, [row["b_id"] for row in drifted])
+    return len(drifted)
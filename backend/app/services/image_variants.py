@@ -0,0 +1,162 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from uuid import UUID
+from PIL import Image as PILImage, ImageOps
+from sqlalchemy import or_
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.image import Image
+from .storage import get_storage
+from .upload import delete_upload_file
+
+VARIANT_QUALITY = {"webp": 80, "avif": 60, "jpeg": 82}
+
+_executor: Optional[ProcessPoolExecutor] = None
+# Keeps background generation tasks referenced until they finish
+_tasks: Set[asyncio.Task] = set()
+
+
+def _saveable_formats(formats: List[str]) -> List[str]:
+    try:
+        import pillow_avif  # noqa: F401  optional AVIF encoder for older Pillow
+    except ImportError:
+        pass
+    PILImage.init()
+    return [fmt for fmt in formats if fmt.upper() in PILImage.SAVE]
+
+
+def generate_variants(
+    source_path: str, output_dir: str, widths: List[int], formats: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Write resized copies of source_path into output_dir, one per
+    (width, format), never upscaling. Runs in a worker process; returns
+    what it wrote.
+    """
+    source = Path(source_path)
+    output = Path(output_dir)
+    variants = []
+    with PILImage.open(source) as original:
+        if getattr(original, "n_frames", 1) > 1:
+            return []  # Leave animated GIF/WebP as they are
+
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+
+        saveable = _saveable_formats(formats)
+        for width in sorted({min(w, image.width) for w in widths}):
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), PILImage.LANCZOS)
+            for fmt in saveable:
+                filename = f"{source.stem}-{width}w.{fmt}"
+                tmp_path = output / f".{filename}.tmp"
+                resized.save(tmp_path, fmt.upper(), quality=VARIANT_QUALITY.get(fmt, 80))
+                os.replace(tmp_path, output / filename)
+                variants.append({"filename": filename, "width": width, "height": height, "format": fmt})
+    return variants
+
+
+def start_image_workers():
+    global _executor
+    if _executor is None and settings.image_variant_workers > 0:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.image_variant_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+
+def shutdown_image_workers():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _save_variants(image_id: UUID, image_url: str, variants: List[Dict[str, Any]]) -> bool:
+    """
+    Store variants on the image and on every other image sharing its blob
+    that has none yet (re-uploads made while these were being generated).
+    False if no row took them.
+    """
+    db = SessionLocal()
+    try:
+        updated = db.query(Image).filter(
+            Image.image_url == image_url,
+            or_(Image.id == image_id, Image.variants.is_(None))
+        ).update({"variants": variants}, synchronize_session=False)
+        db.commit()
+        return updated > 0
+    finally:
+        db.close()
+
+
+def _discard_variants(image_url: str, variants: List[Dict[str, Any]]):
+    """Remove derivatives written for a deleted image, unless other images share the blob."""
+    db = SessionLocal()
+    try:
+        delete_upload_file(image_url, db, variants)
+    finally:
+        db.close()
+
+
+async def _build_variants(key: str) -> List[Dict[str, Any]]:
+    """Fetch the original, render its derivatives and store them; returns what was stored."""
+    storage = get_storage()
+    # Work files go to scratch space, never into the served upload directory
+    work_dir = await run_in_threadpool(tempfile.mkdtemp, dir=storage.scratch_dir(), prefix="variants-")
+    source_copy = storage.local_copy(key)
+    try:
+        source = await run_in_threadpool(source_copy.__enter__)
+        try:
+            args = (source, work_dir, settings.image_variant_widths, settings.image_variant_formats)
+            if _executor is not None:
+                # Awaited, so no threadpool worker sits blocked on the process pool
+                written = await asyncio.get_running_loop().run_in_executor(_executor, generate_variants, *args)
+            else:
+                written = await run_in_threadpool(generate_variants, *args)
+        finally:
+            await run_in_threadpool(source_copy.__exit__, None, None, None)
+        for v in written:
+            await run_in_threadpool(storage.save, v["filename"], os.path.join(work_dir, v["filename"]))
+        return written
+    finally:
+        await run_in_threadpool(shutil.rmtree, work_dir, True)
+
+
+async def create_image_variants(image_id: UUID, image_url: str):
+    """Generate derivatives for an uploaded image and record them on its row."""
+    storage = get_storage()
+    key = storage.key_from_url(image_url)
+    if not settings.image_variant_widths or not key:
+        return
+
+    try:
+        start_image_workers()
+        written = await _build_variants(key)
+    except Exception as e:
+        print(f"[Image Variants] Failed for {image_url}: {e}")
+        return
+
+    variants = [
+        {"url": storage.url(v["filename"]), "width": v["width"], "height": v["height"], "format": v["format"]}
+        for v in written
+    ]
+    if not await run_in_threadpool(_save_variants, image_id, image_url, variants):
+        # Image (and every copy of it) was deleted while we were working
+        await run_in_threadpool(_discard_variants, image_url, variants)
+
+
+def schedule_image_variants(image_id: UUID, image_url: str):
+    """Generate derivatives in the background so the upload returns right away."""
+    task = asyncio.create_task(create_image_variants(image_id, image_url))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
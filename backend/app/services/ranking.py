@@ -0,0 +1,119 @@
+import asyncio
+import math
+from datetime import datetime, timezone
+from typing import Optional, List, Tuple
+from uuid import UUID
+from sqlalchemy import Float, bindparam, case, cast, func, literal
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..database import SessionLocal
+from ..models.app import App
+
+# Hot ranking gravity: how quickly a post sinks as it ages (Hacker News style)
+HOT_GRAVITY = 1.8
+REFRESH_BATCH_SIZE = 500
+
+
+def compute_scores(upvotes: int, downvotes: int, created_at: datetime, now: Optional[datetime] = None) -> Tuple[int, float, float]:
+    """Return (net_score, hot_score, controversy_score) for one app."""
+    now = now or datetime.utcnow()
+    net_score = upvotes - downvotes
+
+    age_hours = max((now - created_at).total_seconds() / 3600, 0)
+    hot_score = net_score / math.pow(age_hours + 2, HOT_GRAVITY)
+
+    # Many votes, evenly split between up and down, is most controversial
+    if upvotes <= 0 or downvotes <= 0:
+        controversy_score = 0.0
+    else:
+        balance = downvotes / upvotes if upvotes > downvotes else upvotes / downvotes
+        controversy_score = math.pow(upvotes + downvotes, balance)
+
+    return net_score, hot_score, controversy_score
+
+
+def refresh_app_scores(db: Session, app_ids: Optional[List[UUID]] = None) -> int:
+    """
+    Recompute ranking scores from the stored vote counters, for the given
+    apps or for every app. Runs in the caller's transaction after it has
+    updated (and so locked) the counters; the caller commits. Returns the
+    number of apps updated.
+    """
+    query = db.query(App.id, App.upvotes, App.downvotes, App.created_at)
+    if app_ids is not None:
+        if not app_ids:
+            return 0
+        query = query.filter(App.id.in_(app_ids))
+
+    apps = App.__table__
+    statement = apps.update().where(apps.c.id == bindparam("b_id")).values(
+        net_score=bindparam("b_net_score"),
+        hot_score=bindparam("b_hot_score"),
+        controversy_score=bindparam("b_controversy_score"),
+        updated_at=apps.c.updated_at
+    )
+
+    now = datetime.utcnow()
+    updated = 0
+    batch = []
+    for app_id, upvotes, downvotes, created_at in query.all():
+        net_score, hot_score, controversy_score = compute_scores(upvotes, downvotes, created_at, now)
+        batch.append({
+            "b_id": app_id,
+            "b_net_score": net_score,
+            "b_hot_score": hot_score,
+            "b_controversy_score": controversy_score
+        })
+        if len(batch) >= REFRESH_BATCH_SIZE:
+            db.execute(statement, batch)
+            updated += len(batch)
+            batch = []
+    if batch:
+        db.execute(statement, batch)
+        updated += len(batch)
+    return updated
+
+
+def hot_score_expression(now: datetime):
+    """SQL form of compute_scores' hot_score, evaluated against the current row."""
+    apps = App.__table__
+    age_seconds = literal(now.replace(tzinfo=timezone.utc).timestamp()) - func.extract("epoch", apps.c.created_at)
+    age_hours = case((age_seconds < 0, 0.0), else_=age_seconds / 3600.0)
+    return cast(apps.c.upvotes - apps.c.downvotes, Float) / func.power(age_hours + 2, HOT_GRAVITY)
+
+
+def decay_hot_scores() -> int:
+    """
+    One decay pass over all apps in its own session. A single set-based
+    UPDATE computes hot_score from each row's current counters, so a vote
+    committed meanwhile is never overwritten with scores from stale counts.
+    """
+    db = SessionLocal()
+    try:
+        apps = App.__table__
+        result = db.execute(
+            apps.update().values(
+                hot_score=hot_score_expression(datetime.utcnow()),
+                updated_at=apps.c.updated_at
+            )
+        )
+        updated = result.rowcount
+        db.commit()
+        return updated
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def run_hot_score_decay(interval_minutes: int):
+    """Background loop: re-decay hot scores every interval_minutes."""
+    while True:
+        await asyncio.sleep(interval_minutes * 60)
+        try:
+            updated = await run_in_threadpool(decay_hot_scores)
+            print(f"[Ranking] Decayed hot scores for {updated} apps")
+        except Exception as e:
+            print(f"[Ranking] Decay pass failed: {e}")
@@ -0,0 +1,108 @@
+import hashlib
+import time
+from typing import Dict, Optional
+import httpx
+
+# Assumed window when upstream says we're out of budget but not until when
+# (no reset header, or a 403 without Retry-After)
+DEFAULT_RESET_SECONDS = 60
+
+
+class RateLimitBudget:
+    """Last known request budget for one upstream token (or the anonymous IP)."""
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None  # epoch seconds
+        self.skipped_interactive = 0
+        self.skipped_background = 0
+
+
+class UpstreamRateLimiter:
+    """
+    Tracks X-RateLimit-* budgets per bucket and decides whether a call may
+    go upstream. Interactive requests may spend the budget down to zero;
+    background refreshes stop once only background_reserve (a fraction of
+    the limit) is left, so visitors always get the last requests.
+    """
+
+    def __init__(self, background_reserve: float):
+        self.background_reserve = background_reserve
+        self._buckets: Dict[str, RateLimitBudget] = {}
+
+    @staticmethod
+    def bucket_for(platform: str, token: Optional[str]) -> str:
+        """Budgets are per token; anonymous calls share our egress IP's budget."""
+        if not token:
+            return f"{platform}:anonymous"
+        digest = hashlib.sha256(token.encode("utf-8")).hexdigest()[:12]
+        return f"{platform}:token:{digest}"
+
+    def allow(self, bucket: str, background: bool = False) -> bool:
+        budget = self._buckets.get(bucket)
+        if budget is None or budget.remaining is None:
+            return True
+
+        if budget.reset_at is not None and time.time() >= budget.reset_at:
+            # Window has reset; the next response will tell us the real budget
+            budget.remaining = budget.limit
+            budget.reset_at = None
+            return True
+
+        floor = 0
+        if background and budget.limit:
+            floor = max(1, int(budget.limit * self.background_reserve))
+        if budget.remaining is not None and budget.remaining <= floor:
+            if budget.reset_at is None:
+                # Without a reset time the bucket would never reopen
+                budget.reset_at = time.time() + DEFAULT_RESET_SECONDS
+            if background:
+                budget.skipped_background += 1
+            else:
+                budget.skipped_interactive += 1
+            return False
+
+        # Spend optimistically so concurrent calls don't all see the same budget
+        budget.remaining -= 1
+        return True
+
+    def record(self, bucket: str, response: httpx.Response):
+        """Update a bucket from upstream rate-limit headers (GitHub or GitLab names)."""
+        headers = response.headers
+        budget = self._buckets.setdefault(bucket, RateLimitBudget())
+
+        remaining = headers.get("X-RateLimit-Remaining") or headers.get("RateLimit-Remaining")
+        limit = headers.get("X-RateLimit-Limit") or headers.get("RateLimit-Limit")
+        reset = headers.get("X-RateLimit-Reset") or headers.get("RateLimit-Reset")
+        try:
+            if remaining is not None:
+                budget.remaining = int(remaining)
+            if limit is not None:
+                budget.limit = int(limit)
+            if reset is not None:
+                budget.reset_at = float(reset)
+        except ValueError:
+            pass
+
+        # Secondary/abuse limits: treat as exhausted until Retry-After passes
+        retry_after = headers.get("Retry-After")
+        if response.status_code in (403, 429) and (retry_after or budget.remaining == 0):
+            budget.remaining = 0
+            if retry_after and retry_after.isdigit():
+                budget.reset_at = time.time() + int(retry_after)
+            elif budget.reset_at is None or budget.reset_at <= time.time():
+                budget.reset_at = time.time() + DEFAULT_RESET_SECONDS
+
+    def stats(self) -> Dict[str, dict]:
+        now = time.time()
+        return {
+            bucket: {
+                "limit": budget.limit,
+                "remaining": budget.remaining,
+                "reset_in_seconds": max(0, round(budget.reset_at - now)) if budget.reset_at else None,
+                "skipped_interactive": budget.skipped_interactive,
+                "skipped_background": budget.skipped_background
+            }
+            for bucket, budget in self._buckets.items()
+        }
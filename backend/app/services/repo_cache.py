@@ -0,0 +1,181 @@
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fetched_at: float  # epoch seconds
+    # Upstream validators, sent back as If-None-Match / If-Modified-Since
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, raw) -> "CacheEntry":
+        return cls(**json.loads(raw))
+
+
+class RepoCacheBackend(ABC):
+    """Storage for repository metadata cache entries (see RepositoryService)."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, entry: CacheEntry):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryCacheBackend(RepoCacheBackend):
+    """Per-process LRU capped at max_entries."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    async def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteCacheBackend(RepoCacheBackend):
+    """
+    Cache in a local SQLite file, shared by every uvicorn worker on the host.
+    Keeps at most max_entries rows (oldest fetched are dropped first).
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS repo_cache ("
+                "key TEXT PRIMARY KEY, entry TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_repo_cache_fetched_at ON repo_cache (fetched_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def _get(self, key: str) -> Optional[CacheEntry]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT entry FROM repo_cache WHERE key = ?", (key,)).fetchone()
+        return CacheEntry.from_json(row[0]) if row else None
+
+    def _set(self, key: str, entry: CacheEntry):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO repo_cache (key, entry, fetched_at) VALUES (?, ?, ?)",
+                (key, entry.to_json(), entry.fetched_at)
+            )
+            conn.execute(
+                "DELETE FROM repo_cache WHERE key IN ("
+                "SELECT key FROM repo_cache ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def _delete(self, key: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM repo_cache WHERE key = ?", (key,))
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        return await run_in_threadpool(self._get, key)
+
+    async def set(self, key: str, entry: CacheEntry):
+        await run_in_threadpool(self._set, key, entry)
+
+    async def delete(self, key: str):
+        await run_in_threadpool(self._delete, key)
+
+
+class RedisCacheBackend(RepoCacheBackend):
+    """
+    Cache in Redis (or any Redis-compatible server), shared by every worker
+    and host. Entries expire once they are too old to serve even as stale.
+    """
+
+    KEY_PREFIX = "repo_cache:"
+
+    def __init__(self, url: str, expire_seconds: int):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("REPO_CACHE_BACKEND=redis requires the 'redis' package")
+        self._client = redis.from_url(url)
+        self.expire_seconds = expire_seconds
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        raw = await self._client.get(self.KEY_PREFIX + key)
+        return CacheEntry.from_json(raw) if raw else None
+
+    async def set(self, key: str, entry: CacheEntry):
+        await self._client.set(self.KEY_PREFIX + key, entry.to_json(), ex=self.expire_seconds)
+
+    async def delete(self, key: str):
+        await self._client.delete(self.KEY_PREFIX + key)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+_repo_cache: Optional[RepoCacheBackend] = None
+
+
+def get_repo_cache() -> RepoCacheBackend:
+    """Return the configured cache backend, creating it on first use."""
+    global _repo_cache
+    if _repo_cache is None:
+        backend = settings.repo_cache_backend
+        if backend == "sqlite":
+            _repo_cache = SQLiteCacheBackend(settings.repo_cache_url, settings.repo_cache_max_entries)
+        elif backend == "redis":
+            _repo_cache = RedisCacheBackend(
+                settings.repo_cache_url,
+                settings.repo_cache_ttl_seconds + settings.repo_cache_stale_seconds
+            )
+        else:
+            _repo_cache = MemoryCacheBackend(settings.repo_cache_max_entries)
+    return _repo_cache
+
+
+async def close_repo_cache():
+    global _repo_cache
+    if _repo_cache is not None:
+        await _repo_cache.close()
+        _repo_cache = None
@@ -1,25 +1,123 @@
+import asyncio
 import httpx
-from typing import Optional, List, Dict, Any, Tuple
-from datetime import datetime, timedelta
+import time
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable
+from dataclasses import dataclass
 import re
-
-# Simple in-memory cache (keyed by token hash + repo for privacy)
-_commit_cache: Dict[str, Tuple[List[Dict], datetime]] = {}
-_repo_cache: Dict[str, Tuple[Optional[Dict], datetime]] = {}
-CACHE_TTL_MINUTES = 5
+from ..config import settings
+from .repo_cache import CacheEntry, get_repo_cache
+from .rate_limit import UpstreamRateLimiter
+
+# Upstream fetches in flight in this process, by cache key; concurrent
+# callers for the same key share one task instead of each hitting upstream
+_inflight: Dict[str, asyncio.Task] = {}
+
+cache_stats: Dict[str, int] = {
+    "fresh_hits": 0,
+    "stale_hits": 0,
+    "misses": 0,
+    "background_refreshes": 0,
+    "upstream_fetches": 0,
+    "not_modified": 0,
+    "coalesced": 0,
+    "rate_limited": 0,
+}
+
+rate_limiter = UpstreamRateLimiter(settings.repo_rate_limit_background_reserve)
+
+
+class UpstreamUnavailable(Exception):
+    """Upstream could not be asked (rate limited, 5xx, timeout) and nothing is cached."""
+
+
+@dataclass
+class UpstreamResult:
+    """
+    A parsed upstream payload plus the validators to revalidate it with.
+    failed marks a fetch that told us nothing (5xx, timeout, 403, ...), as
+    opposed to a definite answer such as a 404, so the cached value is kept.
+    """
+    value: Any = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False
+    failed: bool = False
+
+    @classmethod
+    def from_response(cls, response: httpx.Response, value: Any) -> "UpstreamResult":
+        return cls(
+            value=value,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+        )
+
+# One long-lived, pooled client per platform (created on app startup)
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401 - optional, installed via httpx[http2]
+        return True
+    except ImportError:
+        return False
+
+
+def get_http_client(platform: str) -> httpx.AsyncClient:
+    """Return the shared client for a platform, creating it on first use."""
+    client = _http_clients.get(platform)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=settings.repo_http2 and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=settings.repo_http_max_connections,
+                max_keepalive_connections=settings.repo_http_max_keepalive_connections,
+                keepalive_expiry=settings.repo_http_keepalive_expiry_seconds
+            ),
+            timeout=httpx.Timeout(
+                settings.repo_http_timeout_seconds,
+                connect=settings.repo_http_connect_timeout_seconds
+            )
+        )
+        _http_clients[platform] = client
+    return client
+
+
+def start_http_clients():
+    for platform in ("github", "gitlab"):
+        get_http_client(platform)
+
+
+async def close_http_clients():
+    clients = list(_http_clients.values())
+    _http_clients.clear()
+    for client in clients:
+        await client.aclose()
 
 
 class RepositoryService:
     GITHUB_API = "https://api.github.com"
     GITLAB_API = "https://gitlab.com/api/v4"
 
-    def __init__(self, github_token: Optional[str] = None, gitlab_token: Optional[str] = None):
+    def __init__(
+        self,
+        github_token: Optional[str] = None,
+        gitlab_token: Optional[str] = None,
+        background: bool = False
+    ):
         self.github_token = github_token
         self.gitlab_token = gitlab_token
+        # Background callers (the prefetcher) revalidate instead of taking
+        # stale entries, and yield rate-limit budget to interactive requests
+        self.background = background
 
     def with_token(self, github_token: Optional[str] = None) -> "RepositoryService":
         """Create a new instance with a specific GitHub token."""
-        return RepositoryService(github_token=github_token, gitlab_token=self.gitlab_token)
+        return RepositoryService(
+            github_token=github_token,
+            gitlab_token=self.gitlab_token,
+            background=self.background
+        )
 
     @staticmethod
     def parse_repo_url(url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
@@ -74,12 +172,164 @@ class RepositoryService:
             headers["PRIVATE-TOKEN"] = self.gitlab_token
         return headers
 
+    @staticmethod
+    def _conditional_headers(headers: Dict[str, str], entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """Add If-None-Match/If-Modified-Since from a cached entry, so an
+        unchanged resource comes back as a cheap 304 (which GitHub doesn't
+        count against the rate limit)."""
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def _rate_limit_bucket(self, platform: str) -> str:
+        token = self.github_token if platform == "github" else self.gitlab_token
+        return rate_limiter.bucket_for(platform, token)
+
+    async def _upstream_get(
+        self,
+        platform: str,
+        url: str,
+        headers: Dict[str, str],
+        params: Optional[Dict[str, Any]] = None
+    ) -> httpx.Response:
+        """GET on the shared client, recording the rate-limit headers."""
+        response = await get_http_client(platform).get(url, headers=headers, params=params)
+        rate_limiter.record(self._rate_limit_bucket(platform), response)
+        return response
+
+    async def _cached(
+        self,
+        platform: str,
+        cache_key: str,
+        fetch: Callable[[Optional[CacheEntry]], Awaitable[UpstreamResult]],
+        cache_empty: bool
+    ) -> Any:
+        """
+        Serve cache_key from the repository cache. Fresh entries are returned
+        as-is; entries past their TTL but within the stale window are returned
+        immediately while one background refresh runs; otherwise fetch inline.
+        """
+        entry = await get_repo_cache().get(cache_key)
+        if entry is not None:
+            age = time.time() - entry.fetched_at
+            if age < settings.repo_cache_ttl_seconds:
+                cache_stats["fresh_hits"] += 1
+                return entry.value
+            if not self.background and age < settings.repo_cache_ttl_seconds + settings.repo_cache_stale_seconds:
+                cache_stats["stale_hits"] += 1
+                if cache_key not in _inflight:
+                    cache_stats["background_refreshes"] += 1
+                    self._single_flight(platform, cache_key, entry, fetch, cache_empty, background=True)
+                return entry.value
+
+        cache_stats["misses"] += 1
+        # Shielded so a caller giving up (e.g. the commits deadline) doesn't
+        # cancel the fetch other callers are waiting on
+        return await asyncio.shield(
+            self._single_flight(platform, cache_key, entry, fetch, cache_empty, background=self.background)
+        )
+
+    def _single_flight(
+        self,
+        platform: str,
+        cache_key: str,
+        entry: Optional[CacheEntry],
+        fetch: Callable[[Optional[CacheEntry]], Awaitable[UpstreamResult]],
+        cache_empty: bool,
+        background: bool = False
+    ) -> asyncio.Task:
+        """Return the in-flight refresh for cache_key, starting one if needed."""
+        task = _inflight.get(cache_key)
+        if task is not None:
+            cache_stats["coalesced"] += 1
+            return task
+
+        task = asyncio.create_task(self._refresh(platform, cache_key, entry, fetch, cache_empty, background))
+        _inflight[cache_key] = task
+
+        def done(finished: asyncio.Task):
+            _inflight.pop(cache_key, None)
+            if not finished.cancelled() and finished.exception() is not None:
+                print(f"[Repository] Refresh of {cache_key} failed: {finished.exception()}")
+
+        task.add_done_callback(done)
+        return task
+
+    async def _refresh(
+        self,
+        platform: str,
+        cache_key: str,
+        entry: Optional[CacheEntry],
+        fetch: Callable[[Optional[CacheEntry]], Awaitable[UpstreamResult]],
+        cache_empty: bool,
+        background: bool = False
+    ) -> Any:
+        """Fetch upstream, revalidating against entry's ETag/Last-Modified if any."""
+        if not rate_limiter.allow(self._rate_limit_bucket(platform), background):
+            # Budget spent until the reset: serve whatever we have, however old
+            cache_stats["rate_limited"] += 1
+            if entry is None:
+                raise UpstreamUnavailable(f"{platform} rate limit spent")
+            return entry.value
+
+        cache_stats["upstream_fetches"] += 1
+        result = await fetch(entry)
+
+        if result.not_modified and entry is not None:
+            # 304: the cached payload is still current, just extend it
+            cache_stats["not_modified"] += 1
+            entry.fetched_at = time.time()
+            await get_repo_cache().set(cache_key, entry)
+            return entry.value
+
+        if result.failed:
+            # Keep serving what we had; a later request retries the fetch
+            if entry is None:
+                raise UpstreamUnavailable(f"{platform} fetch of {cache_key} failed")
+            return entry.value
+
+        if result.value or cache_empty:
+            await get_repo_cache().set(cache_key, CacheEntry(
+                value=result.value,
+                fetched_at=time.time(),
+                etag=result.etag,
+                last_modified=result.last_modified
+            ))
+        return result.value
+
+    @classmethod
+    async def invalidate(cls, url: str):
+        """Drop every cached variant (commits and info, with and without auth) for url."""
+        platform, owner, repo = cls.parse_repo_url(url)
+        if not platform or not owner or not repo:
+            return
+        cache = get_repo_cache()
+        for suffix in (":auth", ":noauth", ":info:auth", ":info:noauth"):
+            await cache.delete(f"{platform}:{owner}/{repo}{suffix}")
+
     async def get_recent_commits(
         self,
         url: str,
         limit: int = 10
     ) -> List[Dict[str, Any]]:
-        """Fetch recent commits from a repository."""
+        """Fetch recent commits from a repository ([] if unavailable)."""
+        try:
+            return await self.fetch_recent_commits(url, limit)
+        except Exception:
+            return []
+
+    async def fetch_recent_commits(
+        self,
+        url: str,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Like get_recent_commits, but raises UpstreamUnavailable when the fetch
+        failed, so callers can tell that apart from a repository without commits.
+        """
         platform, owner, repo = self.parse_repo_url(url)
         if not platform or not owner or not repo:
             return []
@@ -88,100 +338,101 @@ class RepositoryService:
         auth_suffix = ":auth" if self.github_token else ":noauth"
         cache_key = f"{platform}:{owner}/{repo}{auth_suffix}"
 
-        # Check cache
-        if cache_key in _commit_cache:
-            commits, cached_at = _commit_cache[cache_key]
-            if datetime.utcnow() - cached_at < timedelta(minutes=CACHE_TTL_MINUTES):
-                return commits[:limit]
-
-        try:
+        async def fetch(entry: Optional[CacheEntry]) -> UpstreamResult:
             if platform == "github":
-                commits = await self._fetch_github_commits(owner, repo, limit)
-            else:
-                commits = await self._fetch_gitlab_commits(owner, repo, limit)
+                return await self._fetch_github_commits(owner, repo, limit, entry)
+            return await self._fetch_gitlab_commits(owner, repo, limit, entry)
 
-            if commits:
-                _commit_cache[cache_key] = (commits, datetime.utcnow())
-            return commits
-        except Exception:
-            return []
+        commits = await self._cached(platform, cache_key, fetch, cache_empty=False)
+        return (commits or [])[:limit]
 
     async def _fetch_github_commits(
         self,
         owner: str,
         repo: str,
-        limit: int
-    ) -> List[Dict[str, Any]]:
+        limit: int,
+        entry: Optional[CacheEntry] = None
+    ) -> UpstreamResult:
         """Fetch commits from GitHub."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.GITHUB_API}/repos/{owner}/{repo}/commits",
-                    headers=self._get_github_headers(),
-                    params={"per_page": limit},
-                    timeout=10.0
-                )
-
-                print(f"[GitHub Commits] {owner}/{repo} - Status: {response.status_code}")
-                if response.status_code != 200:
-                    print(f"[GitHub Commits] Error response: {response.text[:500]}")
-
-                if response.status_code == 200:
-                    commits = response.json()
-                    return [
-                        {
-                            "sha": c["sha"][:7],
-                            "full_sha": c["sha"],
-                            "message": c["commit"]["message"].split("\n")[0][:100],
-                            "author": c["commit"]["author"]["name"],
-                            "date": c["commit"]["author"]["date"],
-                            "url": c["html_url"]
-                        }
-                        for c in commits
-                    ]
-                return []
+            response = await self._upstream_get(
+                "github",
+                f"{self.GITHUB_API}/repos/{owner}/{repo}/commits",
+                headers=self._conditional_headers(self._get_github_headers(), entry),
+                params={"per_page": limit}
+            )
+
+            print(f"[GitHub Commits] {owner}/{repo} - Status: {response.status_code}")
+            if response.status_code == 304:
+                return UpstreamResult(not_modified=True)
+            if response.status_code != 200:
+                print(f"[GitHub Commits] Error response: {response.text[:500]}")
+
+            if response.status_code == 200:
+                commits = response.json()
+                return UpstreamResult.from_response(response, [
+                    {
+                        "sha": c["sha"][:7],
+                        "full_sha": c["sha"],
+                        "message": c["commit"]["message"].split("\n")[0][:100],
+                        "author": c["commit"]["author"]["name"],
+                        "date": c["commit"]["author"]["date"],
+                        "url": c["html_url"]
+                    }
+                    for c in commits
+                ])
+            return UpstreamResult(value=[], failed=response.status_code != 404)
         except Exception as e:
             print(f"[GitHub Commits] Exception: {e}")
-            return []
+            return UpstreamResult(value=[], failed=True)
 
     async def _fetch_gitlab_commits(
         self,
         owner: str,
         repo: str,
-        limit: int
-    ) -> List[Dict[str, Any]]:
+        limit: int,
+        entry: Optional[CacheEntry] = None
+    ) -> UpstreamResult:
         """Fetch commits from GitLab."""
         try:
             # GitLab uses URL-encoded project path
             project_path = f"{owner}/{repo}".replace("/", "%2F")
 
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.GITLAB_API}/projects/{project_path}/repository/commits",
-                    headers=self._get_gitlab_headers(),
-                    params={"per_page": limit},
-                    timeout=10.0
-                )
-
-                if response.status_code == 200:
-                    commits = response.json()
-                    return [
-                        {
-                            "sha": c["short_id"],
-                            "full_sha": c["id"],
-                            "message": c["title"][:100],
-                            "author": c["author_name"],
-                            "date": c["committed_date"],
-                            "url": c["web_url"]
-                        }
-                        for c in commits
-                    ]
-                return []
+            response = await self._upstream_get(
+                "gitlab",
+                f"{self.GITLAB_API}/projects/{project_path}/repository/commits",
+                headers=self._conditional_headers(self._get_gitlab_headers(), entry),
+                params={"per_page": limit}
+            )
+
+            if response.status_code == 304:
+                return UpstreamResult(not_modified=True)
+            if response.status_code == 200:
+                commits = response.json()
+                return UpstreamResult.from_response(response, [
+                    {
+                        "sha": c["short_id"],
+                        "full_sha": c["id"],
+                        "message": c["title"][:100],
+                        "author": c["author_name"],
+                        "date": c["committed_date"],
+                        "url": c["web_url"]
+                    }
+                    for c in commits
+                ])
+            return UpstreamResult(value=[], failed=response.status_code != 404)
         except Exception:
-            return []
+            return UpstreamResult(value=[], failed=True)
 
     async def get_repo_info(self, url: str) -> Optional[Dict[str, Any]]:
-        """Fetch repository information."""
+        """Fetch repository information (None if unavailable)."""
+        try:
+            return await self.fetch_repo_info(url)
+        except Exception:
+            return None
+
+    async def fetch_repo_info(self, url: str) -> Optional[Dict[str, Any]]:
+        """Like get_repo_info, but raises UpstreamUnavailable when the fetch failed."""
         platform, owner, repo = self.parse_repo_url(url)
         if not platform or not owner or not repo:
             return None
@@ -190,88 +441,82 @@ class RepositoryService:
         auth_suffix = ":auth" if self.github_token else ":noauth"
         cache_key = f"{platform}:{owner}/{repo}:info{auth_suffix}"
 
-        # Check cache
-        if cache_key in _repo_cache:
-            info, cached_at = _repo_cache[cache_key]
-            if datetime.utcnow() - cached_at < timedelta(minutes=CACHE_TTL_MINUTES):
-                return info
-
-        try:
+        async def fetch(entry: Optional[CacheEntry]) -> UpstreamResult:
             if platform == "github":
-                info = await self._fetch_github_repo_info(owner, repo)
-            else:
-                info = await self._fetch_gitlab_repo_info(owner, repo)
+                return await self._fetch_github_repo_info(owner, repo, entry)
+            return await self._fetch_gitlab_repo_info(owner, repo, entry)
 
-            _repo_cache[cache_key] = (info, datetime.utcnow())
-            return info
-        except Exception:
-            return None
+        return await self._cached(platform, cache_key, fetch, cache_empty=True)
 
     async def _fetch_github_repo_info(
         self,
         owner: str,
-        repo: str
-    ) -> Optional[Dict[str, Any]]:
+        repo: str,
+        entry: Optional[CacheEntry] = None
+    ) -> UpstreamResult:
         """Fetch repository info from GitHub."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.GITHUB_API}/repos/{owner}/{repo}",
-                    headers=self._get_github_headers(),
-                    timeout=10.0
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        "name": data["name"],
-                        "full_name": data["full_name"],
-                        "description": data.get("description"),
-                        "stars": data["stargazers_count"],
-                        "forks": data["forks_count"],
-                        "language": data.get("language"),
-                        "open_issues": data["open_issues_count"],
-                        "default_branch": data["default_branch"],
-                        "url": data["html_url"],
-                        "is_private": data["private"]
-                    }
-                return None
+            response = await self._upstream_get(
+                "github",
+                f"{self.GITHUB_API}/repos/{owner}/{repo}",
+                headers=self._conditional_headers(self._get_github_headers(), entry)
+            )
+
+            if response.status_code == 304:
+                return UpstreamResult(not_modified=True)
+            if response.status_code == 200:
+                data = response.json()
+                return UpstreamResult.from_response(response, {
+                    "name": data["name"],
+                    "full_name": data["full_name"],
+                    "description": data.get("description"),
+                    "stars": data["stargazers_count"],
+                    "forks": data["forks_count"],
+                    "language": data.get("language"),
+                    "open_issues": data["open_issues_count"],
+                    "default_branch": data["default_branch"],
+                    "url": data["html_url"],
+                    "is_private": data["private"]
+                })
+            return UpstreamResult(failed=response.status_code != 404)
         except Exception:
-            return None
+            return UpstreamResult(failed=True)
 
     async def _fetch_gitlab_repo_info(
         self,
         owner: str,
-        repo: str
-    ) -> Optional[Dict[str, Any]]:
+        repo: str,
+        entry: Optional[CacheEntry] = None
+    ) -> UpstreamResult:
         """Fetch repository info from GitLab."""
         try:
             project_path = f"{owner}/{repo}".replace("/", "%2F")
 
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.GITLAB_API}/projects/{project_path}",
-                    headers=self._get_gitlab_headers(),
-                    timeout=10.0
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        "name": data["name"],
-                        "full_name": data["path_with_namespace"],
-                        "description": data.get("description"),
-                        "stars": data.get("star_count", 0),
-                        "forks": data.get("forks_count", 0),
-                        "language": None,  # GitLab doesn't have a primary language field
-                        "open_issues": data.get("open_issues_count", 0),
-                        "default_branch": data.get("default_branch", "main"),
-                        "url": data["web_url"],
-                        "is_private": data.get("visibility") == "private"
-                    }
-                return None
+            response = await self._upstream_get(
+                "gitlab",
+                f"{self.GITLAB_API}/projects/{project_path}",
+                headers=self._conditional_headers(self._get_gitlab_headers(), entry)
+            )
+
+            if response.status_code == 304:
+                return UpstreamResult(not_modified=True)
+            if response.status_code == 200:
+                data = response.json()
+                return UpstreamResult.from_response(response, {
+                    "name": data["name"],
+                    "full_name": data["path_with_namespace"],
+                    "description": data.get("description"),
+                    "stars": data.get("star_count", 0),
+                    "forks": data.get("forks_count", 0),
+                    "language": None,  # GitLab doesn't have a primary language field
+                    "open_issues": data.get("open_issues_count", 0),
+                    "default_branch": data.get("default_branch", "main"),
+                    "url": data["web_url"],
+                    "is_private": data.get("visibility") == "private"
+                })
+            return UpstreamResult(failed=response.status_code != 404)
         except Exception:
-            return None
+            return UpstreamResult(failed=True)
 
 
 # Global service instance
@@ -0,0 +1,57 @@
+import re
+from typing import List, Optional, Tuple
+from sqlalchemy import func, literal_column, text, column, or_
+from sqlalchemy.orm import Session, Query
+
+from ..models.app import App
+
+SEARCH_CONFIG = "english"
+
+
+def _search_terms(term: str) -> List[str]:
+    """Split a user query into plain word tokens (drops any query syntax)."""
+    return [t.lower() for t in re.findall(r"\w+", term)]
+
+
+def apply_search(db: Session, query: Query, term: str) -> Tuple[Query, Optional[object]]:
+    """
+    Restrict an App query to full-text matches for term, with prefix
+    matching on every word (all words must match).
+
+    Returns (query, relevance) where relevance is an ORDER BY clause putting
+    the best matches first, or None when the backend can't rank.
+    """
+    terms = _search_terms(term)
+    if not terms:
+        return query, None
+
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        # Generated tsvector column with GIN index (see models/app.py)
+        search_vector = literal_column("apps.search_vector")
+        ts_query = func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{t}:*" for t in terms))
+        query = query.filter(search_vector.op("@@")(ts_query))
+        return query, func.ts_rank_cd(search_vector, ts_query).desc()
+
+    if dialect == "sqlite":
+        # FTS5 shadow table kept in sync by triggers (see models/app.py)
+        matches = text(
+            "SELECT app_id, bm25(apps_fts, 0.0, 10.0, 1.0) AS rank "
+            "FROM apps_fts WHERE apps_fts MATCH :match"
+        ).bindparams(
+            match=" ".join(f'"{t}"*' for t in terms)
+        ).columns(column("app_id"), column("rank")).subquery("app_matches")
+        query = query.join(matches, matches.c.app_id == App.id)
+        # bm25 scores are lower-is-better
+        return query, matches.c.rank.asc()
+
+    # No search index for other backends: substring match, unranked
+    for t in terms:
+        query = query.filter(
+            or_(
+                App.name.ilike(f"%{t}%"),
+                App.full_description.ilike(f"%{t}%")
+            )
+        )
+    return query, None
@@ -0,0 +1,333 @@
+import base64
+import errno
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from ..config import settings
+from ..utils.static_files import CONTENT_ADDRESSED_NAME, IMMUTABLE_CACHE_CONTROL
+
+
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class UploadStorage(ABC):
+    """
+    Where uploaded files live. Keys are bare file names such as
+    <sha256>.png (plus a staging prefix for direct uploads). Methods block,
+    so async code calls them through run_in_threadpool.
+    """
+
+    # Whether browsers can upload straight to the store (presign_upload)
+    supports_direct_upload = False
+
+    def scratch_dir(self) -> str:
+        """
+        Directory for temp files that are handed to save() afterwards; never
+        inside the served upload directory, so half-written files and work
+        directories can't be fetched.
+        """
+        return tempfile.gettempdir()
+
+    @abstractmethod
+    def save(self, key: str, path: str):
+        """Move the finished local file at path into storage under key."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def size(self, key: str) -> Optional[int]:
+        """Size in bytes, or None if the object does not exist."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def checksum(self, key: str) -> str:
+        """Base64 SHA-256 of the object (as in x-amz-checksum-sha256)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_head(self, key: str, length: int) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def copy(self, source_key: str, key: str):
+        raise NotImplementedError
+
+    @contextmanager
+    @abstractmethod
+    def local_copy(self, key: str) -> Iterator[str]:
+        """Yield a local path holding the object's bytes (for image processing)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def key_from_url(self, url: str) -> Optional[str]:
+        """Inverse of url(); None for URLs this storage does not own."""
+        raise NotImplementedError
+
+    def presign_upload(self, key: str, content_type: str, size: int, sha256_b64: str) -> Dict[str, Any]:
+        """Only for backends with supports_direct_upload."""
+        raise NotImplementedError
+
+
+def _sha256_b64(chunks: Iterator[bytes]) -> str:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return base64.b64encode(digest.digest()).decode()
+
+
+def _object_headers(key: str) -> Dict[str, str]:
+    headers = {"ContentType": mimetypes.guess_type(key)[0] or "application/octet-stream"}
+    if CONTENT_ADDRESSED_NAME.match(key):
+        headers["CacheControl"] = IMMUTABLE_CACHE_CONTROL
+    else:
+        headers["CacheControl"] = f"public, max-age={settings.uploads_max_age_seconds}"
+    return headers
+
+
+class LocalStorage(UploadStorage):
+    """Files in upload_dir, served by the app at /uploads (one host only)."""
+
+    URL_PREFIX = "/uploads/"
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        path = self.directory / key
+        if path.parent != self.directory:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def save(self, key: str, path: str):
+        # Same content, same name: replacing an existing blob is a no-op
+        # content-wise and guarantees it exists when we return
+        target = self._path(key)
+        try:
+            os.replace(path, target)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Scratch space is on another filesystem: copy next to the
+            # target first, so the file still appears in one atomic rename
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.")
+            os.close(fd)
+            try:
+                shutil.copyfile(path, tmp_path)
+                os.replace(tmp_path, target)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            os.unlink(path)
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self._path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def checksum(self, key: str) -> str:
+        with open(self._path(key), "rb") as f:
+            return _sha256_b64(iter(lambda: f.read(STREAM_CHUNK_SIZE), b""))
+
+    def read_head(self, key: str, length: int) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read(length)
+
+    def copy(self, source_key: str, key: str):
+        shutil.copyfile(self._path(source_key), self._path(key))
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        yield str(self._path(key))
+
+    def url(self, key: str) -> str:
+        return f"{self.URL_PREFIX}{key}"
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        if url.startswith(self.URL_PREFIX):
+            return url[len(self.URL_PREFIX):]
+        return None
+
+
+class S3Storage(UploadStorage):
+    """
+    Objects in an S3-compatible bucket (AWS, MinIO, R2, ...), shared by every
+    host and served from the bucket or a CDN in front of it. Browsers can
+    upload directly with a presigned PUT, so those bytes never pass through
+    the API.
+    """
+
+    supports_direct_upload = True
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: str = "",
+        region: str = "us-east-1",
+        access_key_id: str = "",
+        secret_access_key: str = "",
+        public_url: str = "",
+        presign_expires_seconds: int = 600
+    ):
+        try:
+            import boto3
+            from botocore.config import Config
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the 'boto3' package")
+        if not bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+
+        self._client_error = ClientError
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None,
+            config=Config(signature_version="s3v4")
+        )
+        self.bucket = bucket
+        self.presign_expires_seconds = presign_expires_seconds
+        if public_url:
+            self.public_url = public_url.rstrip("/")
+        elif endpoint_url:
+            self.public_url = f"{endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            self.public_url = f"https://{bucket}.s3.{region}.amazonaws.com"
+
+    def _is_missing(self, error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def save(self, key: str, path: str):
+        self._client.upload_file(path, self.bucket, key, ExtraArgs=_object_headers(key))
+        os.unlink(path)
+
+    def delete(self, key: str):
+        self._client.delete_object(Bucket=self.bucket, Key=key)
+
+    def _head(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self._client.head_object(Bucket=self.bucket, Key=key, ChecksumMode="ENABLED")
+        except self._client_error as e:
+            if self._is_missing(e):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def size(self, key: str) -> Optional[int]:
+        head = self._head(key)
+        return head["ContentLength"] if head else None
+
+    def checksum(self, key: str) -> str:
+        # AWS and MinIO keep the checksum the uploader sent (and verified);
+        # stores that don't report one are hashed by streaming the object
+        head = self._head(key)
+        if head and head.get("ChecksumSHA256"):
+            return head["ChecksumSHA256"]
+        body = self._client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        return _sha256_b64(body.iter_chunks(STREAM_CHUNK_SIZE))
+
+    def read_head(self, key: str, length: int) -> bytes:
+        response = self._client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes=0-{length - 1}")
+        return response["Body"].read()
+
+    def copy(self, source_key: str, key: str):
+        # Server-side copy: the bytes stay inside the store
+        self._client.copy_object(
+            Bucket=self.bucket,
+            Key=key,
+            CopySource={"Bucket": self.bucket, "Key": source_key},
+            MetadataDirective="REPLACE",
+            **_object_headers(key)
+        )
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        work_dir = tempfile.mkdtemp(prefix="storage-")
+        path = os.path.join(work_dir, key)
+        try:
+            self._client.download_file(self.bucket, key, path)
+            yield path
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        prefix = f"{self.public_url}/"
+        if url.startswith(prefix):
+            return url[len(prefix):]
+        return None
+
+    def presign_upload(self, key: str, content_type: str, size: int, sha256_b64: str) -> Dict[str, Any]:
+        """
+        Presigned PUT for exactly this object. The client must send the
+        returned headers; the store rejects a body whose SHA-256 does not
+        match, and finalize checks size and checksum before accepting it.
+        """
+        url = self._client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ContentLength": size,
+                "ChecksumSHA256": sha256_b64,
+            },
+            ExpiresIn=self.presign_expires_seconds
+        )
+        return {
+            "method": "PUT",
+            "url": url,
+            "headers": {"Content-Type": content_type, "x-amz-checksum-sha256": sha256_b64},
+        }
+
+
+_storage: Optional[UploadStorage] = None
+
+
+def get_storage() -> UploadStorage:
+    """Return the configured upload storage, creating it on first use."""
+    global _storage
+    if _storage is None:
+        if settings.storage_backend == "s3":
+            _storage = S3Storage(
+                settings.s3_bucket,
+                endpoint_url=settings.s3_endpoint_url,
+                region=settings.s3_region,
+                access_key_id=settings.s3_access_key_id,
+                secret_access_key=settings.s3_secret_access_key,
+                public_url=settings.s3_public_url,
+                presign_expires_seconds=settings.s3_presign_expires_seconds
+            )
+        else:
+            _storage = LocalStorage(settings.upload_dir)
+    return _storage
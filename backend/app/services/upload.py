@@ -1,19 +1,61 @@
+import base64
+import hashlib
 import os
-import uuid
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
 from fastapi import UploadFile, HTTPException, status
-from PIL import Image as PILImage
-from ..config import settings
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from ..models.image import Image
+from .storage import get_storage
 
 
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 64 * 1024  # peak memory per upload is about one chunk
+# Direct uploads land here first and are only copied to their final key once
+# finalized; expire this prefix with a bucket lifecycle rule to drop leftovers
+DIRECT_UPLOAD_PREFIX = "incoming/"
+SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
 
+# Leading bytes of each allowed format -> stored extension
+# (WebP is RIFF....WEBP and is checked separately)
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": ".jpg",
+    b"\x89PNG\r\n\x1a\n": ".png",
+    b"GIF87a": ".gif",
+    b"GIF89a": ".gif",
+}
 
-def ensure_upload_dir():
-    upload_path = Path(settings.upload_dir)
-    upload_path.mkdir(parents=True, exist_ok=True)
-    return upload_path
+# Declared type of a direct upload -> stored extension (checked again on finalize)
+CONTENT_TYPE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+
+# Stands in for the advisory lock on databases without one (single-process setups)
+_local_blob_lock = threading.Lock()
+
+
+@dataclass
+class SavedUpload:
+    url: str
+    sha256: str
+    size: int
+    # Where the bytes wait until publish_upload(): a local temp file
+    # (multipart) or a staged object (direct upload). Neither means the
+    # blob was already stored when the upload arrived.
+    temp_path: Optional[str] = None
+    staged_key: Optional[str] = None
 
 
 def validate_image(file: UploadFile):
@@ -28,50 +70,240 @@ def validate_image(file: UploadFile):
     return file_ext
 
 
-async def save_upload_file(file: UploadFile) -> str:
-    """Save uploaded file and return the relative URL path"""
+def sniff_image(header: bytes) -> Optional[str]:
+    """Identify an upload from its first bytes; returns its extension or None."""
+    for signature, ext in IMAGE_SIGNATURES.items():
+        if header.startswith(signature):
+            return ext
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def _file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"File too large. Maximum size is {MAX_FILE_SIZE / 1024 / 1024}MB"
+    )
+
+
+async def save_upload_file(file: UploadFile) -> SavedUpload:
+    """
+    Stream an upload to disk in UPLOAD_CHUNK_SIZE pieces: the size limit is
+    enforced as bytes arrive, the SHA-256 is computed on the fly, and only
+    the first chunk is inspected to check that it is an image. The file is
+    written to a temp file; publish_upload() hands it to the storage backend
+    once the image row is being created, so a partial upload is never visible.
+
+    Files are content-addressed (<sha256><ext>): identical uploads share one
+    blob, and its URL never changes meaning, so it can be cached forever.
+    """
     validate_image(file)
-    
-    # Generate unique filename
-    file_ext = Path(file.filename).suffix.lower()
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    
-    upload_dir = ensure_upload_dir()
-    file_path = upload_dir / unique_filename
-    
-    # Read file content
-    contents = await file.read()
-    
-    # Check file size
-    if len(contents) > MAX_FILE_SIZE:
+    file_ext = None
+
+    # Reject early when the multipart parser already knows the size
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise _file_too_large()
+
+    storage = get_storage()
+    scratch_dir = await run_in_threadpool(storage.scratch_dir)
+    tmp = await run_in_threadpool(
+        tempfile.NamedTemporaryFile, dir=scratch_dir, prefix="upload-", delete=False
+    )
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if size == 0:
+                file_ext = sniff_image(chunk)
+                if file_ext is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Invalid image file"
+                    )
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise _file_too_large()
+            digest.update(chunk)
+            await run_in_threadpool(tmp.write, chunk)
+
+        if size == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid image file"
+            )
+
+        await run_in_threadpool(tmp.close)
+    except BaseException:
+        tmp.close()
+        if os.path.exists(tmp.name):
+            os.unlink(tmp.name)
+        raise
+
+    filename = f"{digest.hexdigest()}{file_ext}"
+    return SavedUpload(url=storage.url(filename), sha256=digest.hexdigest(), size=size, temp_path=tmp.name)
+
+
+def _direct_upload_key(sha256: str, content_type: str) -> str:
+    if not SHA256_HEX.match(sha256):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE / 1024 / 1024}MB"
+            detail="sha256 must be the lowercase hex digest of the file"
         )
-    
-    # Validate it's actually an image
-    try:
-        from io import BytesIO
-        image = PILImage.open(BytesIO(contents))
-        image.verify()
-    except Exception:
+    file_ext = CONTENT_TYPE_EXTENSIONS.get(content_type)
+    if file_ext is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type not allowed. Allowed types: {', '.join(CONTENT_TYPE_EXTENSIONS)}"
+        )
+    return f"{sha256}{file_ext}"
+
+
+def create_direct_upload(sha256: str, content_type: str, size: int) -> Dict[str, Any]:
+    """
+    Presign a browser upload straight to the storage backend. The object is
+    staged under DIRECT_UPLOAD_PREFIX and bound to the declared size and
+    SHA-256; finalize_direct_upload() checks it before it becomes visible.
+    Returns {"upload": None} when identical content is already stored.
+    """
+    storage = get_storage()
+    if not storage.supports_direct_upload:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Direct uploads are not supported by this storage backend"
+        )
+    key = _direct_upload_key(sha256, content_type)
+    if size <= 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid image file"
         )
-    
-    # Save file
-    with open(file_path, "wb") as f:
-        f.write(contents)
-    
-    # Return URL path (relative to uploads directory)
-    return f"/uploads/{unique_filename}"
+    if size > MAX_FILE_SIZE:
+        raise _file_too_large()
+
+    if storage.exists(key):
+        return {"upload": None}
+    checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+    return {"upload": storage.presign_upload(DIRECT_UPLOAD_PREFIX + key, content_type, size, checksum)}
+
+
+def finalize_direct_upload(sha256: str, content_type: str) -> SavedUpload:
+    """
+    Accept a finished direct upload: its size, checksum and leading bytes
+    are checked in place; publish_upload() later copies it server-side to
+    its content-addressed key. A rejected upload is deleted.
+    """
+    storage = get_storage()
+    if not storage.supports_direct_upload:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Direct uploads are not supported by this storage backend"
+        )
+    key = _direct_upload_key(sha256, content_type)
+    staged_key = DIRECT_UPLOAD_PREFIX + key
+
+    size = storage.size(staged_key)
+    if size is None:
+        size = storage.size(key)
+        if size is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload not found"
+            )
+        # Already stored (deduplicated before upload, or finalized twice)
+        return SavedUpload(url=storage.url(key), sha256=sha256, size=size)
+
+    try:
+        if size > MAX_FILE_SIZE:
+            raise _file_too_large()
+        if storage.checksum(staged_key) != base64.b64encode(bytes.fromhex(sha256)).decode():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload does not match its checksum"
+            )
+        if sniff_image(storage.read_head(staged_key, 16)) != key[64:]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid image file"
+            )
+    except BaseException:
+        storage.delete(staged_key)
+        raise
+
+    return SavedUpload(url=storage.url(key), sha256=sha256, size=size, staged_key=staged_key)
+
+
+@contextmanager
+def blob_lock(db: Session, file_url: str) -> Iterator[None]:
+    """
+    Serialize publishing and deleting the blob behind file_url, which
+    identical uploads share. On Postgres this is a transaction-level
+    advisory lock, held across workers until db's transaction ends, so
+    commit inside the block. Other databases get a process-wide lock.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        key = int.from_bytes(hashlib.sha256(file_url.encode("utf-8")).digest()[:8], "big", signed=True)
+        db.execute(select(func.pg_advisory_xact_lock(key)))
+        yield
+    else:
+        with _local_blob_lock:
+            yield
+
+
+def publish_upload(saved: SavedUpload):
+    """
+    Store an accepted upload under its content-addressed key. Call inside
+    blob_lock() together with inserting the image row, so a concurrent
+    delete of the same content can't remove the blob in between.
+    """
+    storage = get_storage()
+    key = storage.key_from_url(saved.url)
+    if saved.temp_path is not None:
+        storage.save(key, saved.temp_path)
+    elif saved.staged_key is not None:
+        # Server-side copy: the bytes stay inside the store
+        storage.copy(saved.staged_key, key)
+    elif not storage.exists(key):
+        # Deduplicated against a blob that has been deleted since
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload not found, please upload the file again"
+        )
+
+
+def discard_upload(saved: SavedUpload):
+    """Remove the temp file or staged object behind saved, once published or abandoned."""
+    if saved.temp_path is not None and os.path.exists(saved.temp_path):
+        os.unlink(saved.temp_path)
+    if saved.staged_key is not None:
+        get_storage().delete(saved.staged_key)
+
+
+def delete_upload_file(
+    file_url: str,
+    db: Optional[Session] = None,
+    variants: Optional[List[Dict[str, Any]]] = None
+):
+    """
+    Delete an uploaded file and its derivatives. With db, blobs are
+    reference counted by Image rows: the files are only removed once no
+    image row points at file_url any more, so call this after the row being
+    removed has been deleted and committed. The check and the delete run
+    under blob_lock(), so an upload of the same content waits for them.
+    """
+    storage = get_storage()
+    keys = [storage.key_from_url(url) for url in [file_url] + [v["url"] for v in variants or []]]
 
+    if db is None:
+        for key in filter(None, keys):
+            storage.delete(key)
+        return
 
-def delete_upload_file(file_url: str):
-    """Delete uploaded file"""
-    if file_url.startswith("/uploads/"):
-        filename = file_url.replace("/uploads/", "")
-        file_path = Path(settings.upload_dir) / filename
-        if file_path.exists():
-            file_path.unlink()
+    with blob_lock(db, file_url):
+        if db.query(Image.id).filter(Image.image_url == file_url).first() is None:
+            for key in filter(None, keys):
+                storage.delete(key)
+        db.commit()  # ends the transaction, releasing the lock
@@ -0,0 +1,168 @@
+import gzip
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli  # optional; without it responses are only gzip-encoded
+except ImportError:
+    brotli = None
+
+# Media types worth compressing; images, fonts (woff2) and archives already are
+COMPRESSIBLE_MEDIA_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "application/xml",
+    "application/wasm",
+    "image/svg+xml",
+)
+
+
+def is_compressible(media_type: Optional[str]) -> bool:
+    return bool(media_type) and media_type.split(";")[0].strip().lower().startswith(COMPRESSIBLE_MEDIA_TYPES)
+
+
+def supported_encodings() -> List[str]:
+    """Encodings we can produce, in order of preference."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: Optional[str], offered: Sequence[str]) -> Optional[str]:
+    """
+    Pick the first of offered (our preference order) that the client's
+    Accept-Encoding allows; None means send the identity body.
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        q = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    for encoding in offered:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """Encode body; best=True trades CPU for size (for one-off precompression)."""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else 4)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+compression_stats: Dict[str, Any] = {"br": 0, "gzip": 0, "skipped": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+def _stream_compressor(encoding: str, brotli_quality: int, gzip_level: int) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """(process, finish) for incremental encoding; process flushes so streamed chunks go out."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=brotli_quality)
+        return (lambda data: compressor.process(data) + compressor.flush()), compressor.finish
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+    return (lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip, whichever the client accepts
+    (brotli preferred), once the body reaches minimum_size. Requests under
+    exclude_paths (already-compressed uploads), responses that already have
+    a Content-Encoding and media types that don't compress pass through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        exclude_paths: Sequence[str] = (),
+        brotli_quality: int = 4,
+        gzip_level: int = 6
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.exclude_paths = tuple(exclude_paths)
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = None
+        if scope["type"] == "http" and not (self.exclude_paths and scope["path"].startswith(self.exclude_paths)):
+            encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"), supported_encodings())
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+        process = finish = None
+
+        async def send_compressed(message: Message):
+            nonlocal start, passthrough, process, finish
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                # pathsend/zerocopysend and friends: nothing to compress
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if process is None:
+                headers = MutableHeaders(raw=start["headers"])
+                if (
+                    "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type"))
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    compression_stats["skipped"] += 1
+                    await send(start)
+                    await send(message)
+                    return
+
+                process, finish = _stream_compressor(encoding, self.brotli_quality, self.gzip_level)
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["etag"] = f"W/{etag}"  # the encoded bytes differ
+                del headers["content-length"]
+                compression_stats[encoding] += 1
+                if not more_body:
+                    data = process(body) + finish()
+                    headers["content-length"] = str(len(data))
+                    compression_stats["bytes_in"] += len(body)
+                    compression_stats["bytes_out"] += len(data)
+                    await send(start)
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                await send(start)
+
+            data = process(body) if body else b""
+            if not more_body:
+                data += finish()
+            compression_stats["bytes_in"] += len(body)
+            compression_stats["bytes_out"] += len(data)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
@@ -7,6 +7,7 @@ from typing import Optional
 from ..database import get_db
 from ..models.user import User
 from ..utils.security import decode_access_token
+from ..utils.user_cache import user_cache, attach_user
 
 security = HTTPBearer()
 optional_security = HTTPBearer(auto_error=False)
@@ -17,6 +18,10 @@ def get_current_user(
     db: Session = Depends(get_db)
 ) -> User:
     token = credentials.credentials
+    snapshot = user_cache.get(token)
+    if snapshot is not None:
+        return attach_user(db, snapshot)
+
     payload = decode_access_token(token)
     if payload is None:
         raise HTTPException(
@@ -32,6 +37,7 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     user_id = UUID(user_id_str)
+    generation = user_cache.generation()
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise HTTPException(
@@ -39,6 +45,7 @@ def get_current_user(
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    user_cache.put(token, user, payload.get("exp"), generation)
     return user
 
 
@@ -52,6 +59,10 @@ def get_optional_user(
     
     try:
         token = credentials.credentials
+        snapshot = user_cache.get(token)
+        if snapshot is not None:
+            return attach_user(db, snapshot)
+
         payload = decode_access_token(token)
         if payload is None:
             return None
@@ -59,7 +70,10 @@ def get_optional_user(
         if user_id_str is None:
             return None
         user_id = UUID(user_id_str)
+        generation = user_cache.generation()
         user = db.query(User).filter(User.id == user_id).first()
+        if user is not None:
+            user_cache.put(token, user, payload.get("exp"), generation)
         return user
     except Exception:
         return None
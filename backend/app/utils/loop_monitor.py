@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop responsiveness: a task asks to sleep for interval
+    seconds and records how late it wakes up. Anything blocking the loop
+    (sync DB calls, PIL, disk I/O in an async route) shows up as lag.
+    """
+
+    def __init__(self, interval_seconds: float, warn_ms: float):
+        self.interval = interval_seconds
+        self.warn_ms = warn_ms
+        self.samples = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.total_lag_ms = 0.0
+        self.slow_samples = 0
+
+    async def run(self):
+        """Background loop: sample the lag every interval seconds."""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - started - self.interval) * 1000)
+
+            self.samples += 1
+            self.last_lag_ms = lag_ms
+            self.total_lag_ms += lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            if lag_ms >= self.warn_ms:
+                self.slow_samples += 1
+                print(f"[Loop Monitor] Event loop blocked for {lag_ms:.0f}ms")
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "samples": self.samples,
+            "last_lag_ms": round(self.last_lag_ms, 2),
+            "avg_lag_ms": round(self.total_lag_ms / self.samples, 2) if self.samples else 0.0,
+            "max_lag_ms": round(self.max_lag_ms, 2),
+            # Cumulative, so callers can diff two readings for a window's average
+            "total_lag_ms": round(self.total_lag_ms, 2),
+            "slow_samples": self.slow_samples
+        }
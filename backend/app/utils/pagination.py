@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+
+def encode_cursor(sort_by: str, order: str, value: Any, row_id: UUID) -> str:
+    """Encode a keyset position (sort value + id) as an opaque URL-safe token."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, order, value, str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str, is_datetime: bool) -> Tuple[Any, UUID]:
+    """
+    Decode a token produced by encode_cursor back into (sort value, id).
+    Raises 400 if the token is malformed or was issued for a different ordering.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_by, cursor_order, value, row_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii"))
+        )
+        if cursor_sort_by != sort_by or cursor_order != order:
+            raise ValueError("cursor ordering mismatch")
+        if is_datetime:
+            value = datetime.fromisoformat(value)
+        return value, UUID(row_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset_after(column, id_column, value: Any, row_id: UUID, descending: bool):
+    """
+    Filter for rows strictly after (value, row_id) in (column, id) order.
+    Uses a row-value comparison so the (column, id) index can seek directly.
+    """
+    if descending:
+        return tuple_(column, id_column) < tuple_(value, row_id)
+    return tuple_(column, id_column) > tuple_(value, row_id)
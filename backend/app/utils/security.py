@@ -1,7 +1,13 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import bcrypt
+import multiprocessing
+import time
 from ..config import settings
 
 
@@ -20,6 +26,87 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+class PasswordHashPool:
+    """
+    Runs bcrypt in a small process pool so a burst of logins can't tie up
+    the threadpool that every sync endpoint shares. At most max_pending
+    hashes may be queued or running; beyond that requests get a 503.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+
+    def start(self):
+        if self._executor is None and self.workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again",
+                headers={"Retry-After": "1"},
+            )
+
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        started = time.perf_counter()
+        try:
+            if self.workers > 0:
+                self.start()
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, fn, *args)
+            return await run_in_threadpool(fn, *args)
+        finally:
+            self.pending -= 1
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.completed += 1
+            self.total_latency_ms += latency_ms
+            self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_latency_ms": round(self.total_latency_ms / self.completed, 2) if self.completed else 0.0,
+            "max_latency_ms": round(self.max_latency_ms, 2)
+        }
+
+
+password_hash_pool = PasswordHashPool(settings.password_hash_workers, settings.password_hash_max_pending)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password hash pool."""
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password hash pool."""
+    return await password_hash_pool.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
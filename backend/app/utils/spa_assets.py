@@ -0,0 +1,193 @@
+import mimetypes
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from hashlib import md5
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+
+from .compression import compress, is_compressible, negotiate_encoding, supported_encodings
+from .static_files import IMMUTABLE_CACHE_CONTROL, etag_matches
+
+# Vite puts content-hashed bundles under assets/; everything else may change
+# between deploys without changing its name
+HASHED_PREFIX = "assets/"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+# index.html is always revalidated (cheap 304s) so new deploys show up at once
+INDEX_CACHE_CONTROL = "no-cache"
+MAX_MEMORY_FILE_SIZE = 4 * 1024 * 1024  # larger files are streamed from disk
+MIN_COMPRESS_SIZE = 512
+# Build tools may leave precompressed siblings (app.js.br, app.js.gz)
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Cap on remembered misses, so scanners can't grow the set without bound
+MAX_MISSING_PATHS = 10000
+
+
+@dataclass
+class SpaAsset:
+    path: Path
+    media_type: str
+    etag: str
+    cache_control: str
+    last_modified: str
+    mtime: float
+    body: Optional[bytes] = None  # None: too big to keep in memory
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+
+class SpaAssets:
+    """
+    In-memory manifest of the built frontend (static/). Files are read and
+    compressed (brotli/gzip) once at startup, so serving a deep link or an
+    asset costs no filesystem calls. index.html is re-checked at most every
+    index_ttl seconds; when it changed (a redeploy of static/), the whole
+    manifest is rebuilt so the new hashed bundles are served without a
+    restart. Hashed assets missing from the manifest are looked up on disk
+    once, for bundles copied after the index; misses are remembered until
+    the next index check, so stale tabs and scanners asking for old bundles
+    don't cost a disk lookup each. Filesystem work runs in the threadpool.
+    """
+
+    def __init__(self, directory: Path, index_ttl: float):
+        self.directory = directory
+        self.index_ttl = index_ttl
+        self._assets: Dict[str, SpaAsset] = {}
+        self._missing: Set[str] = set()
+        self._index_checked = 0.0
+        self._stats = {"served": 0, "not_modified": 0, "encoded": 0, "reloads": 0, "disk_loads": 0, "missing_hits": 0}
+
+    def load(self):
+        """Build the manifest; blocking, run it in the threadpool."""
+        assets = {}
+        for path in sorted(self.directory.rglob("*")):
+            if not path.is_file() or path.suffix in PRECOMPRESSED_SUFFIXES.values():
+                continue
+            relative = path.relative_to(self.directory).as_posix()
+            assets[relative] = self._load_asset(path, relative)
+        self._assets = assets
+        self._missing = set()
+        self._index_checked = time.monotonic()
+        total = sum(len(asset.body or b"") for asset in assets.values())
+        print(f"[SPA] Loaded {len(assets)} static files ({total // 1024} KiB) from {self.directory}")
+
+    def _load_asset(self, path: Path, relative: str) -> SpaAsset:
+        stat_result = path.stat()
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+        if relative == "index.html":
+            cache_control = INDEX_CACHE_CONTROL
+        elif relative.startswith(HASHED_PREFIX):
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            cache_control = DEFAULT_CACHE_CONTROL
+
+        asset = SpaAsset(
+            path=path,
+            media_type=media_type,
+            etag="",
+            cache_control=cache_control,
+            last_modified=formatdate(stat_result.st_mtime, usegmt=True),
+            mtime=stat_result.st_mtime,
+        )
+        if stat_result.st_size > MAX_MEMORY_FILE_SIZE:
+            asset.etag = md5(f"{stat_result.st_mtime}-{stat_result.st_size}".encode()).hexdigest()
+            return asset
+
+        asset.body = path.read_bytes()
+        asset.etag = md5(asset.body).hexdigest()
+        if len(asset.body) >= MIN_COMPRESS_SIZE and is_compressible(media_type):
+            for encoding in supported_encodings():
+                sibling = path.with_name(path.name + PRECOMPRESSED_SUFFIXES[encoding])
+                encoded = sibling.read_bytes() if sibling.is_file() else compress(asset.body, encoding, best=True)
+                if len(encoded) < len(asset.body):
+                    asset.encoded[encoding] = encoded
+        return asset
+
+    def _reload_if_changed(self):
+        index = self._assets.get("index.html")
+        try:
+            mtime = (self.directory / "index.html").stat().st_mtime
+        except FileNotFoundError:
+            return
+        if index is None or mtime != index.mtime:
+            self.load()
+            self._stats["reloads"] += 1
+
+    def _load_from_disk(self, relative: str) -> Optional[SpaAsset]:
+        path = (self.directory / relative).resolve()
+        if (self.directory / HASHED_PREFIX).resolve() not in path.parents or not path.is_file():
+            if len(self._missing) >= MAX_MISSING_PATHS:
+                self._missing.clear()
+            self._missing.add(relative)
+            return None
+        asset = self._load_asset(path, relative)
+        self._assets[relative] = asset
+        self._stats["disk_loads"] += 1
+        return asset
+
+    async def refresh(self):
+        """Re-check index.html once index_ttl has passed (one caller does the work)."""
+        now = time.monotonic()
+        if now - self._index_checked < self.index_ttl:
+            return
+        self._index_checked = now
+        self._missing.clear()  # bundles may have been copied since
+        await run_in_threadpool(self._reload_if_changed)
+
+    async def get(self, path: str) -> Optional[SpaAsset]:
+        await self.refresh()
+        if path in ("", "index.html"):
+            return self._assets.get("index.html")
+        asset = self._assets.get(path)
+        if asset is None and path.startswith(HASHED_PREFIX):
+            if path in self._missing:
+                self._stats["missing_hits"] += 1
+                return None
+            asset = await run_in_threadpool(self._load_from_disk, path)
+        return asset
+
+    async def index(self) -> Optional[SpaAsset]:
+        await self.refresh()
+        return self._assets.get("index.html")
+
+    def response(self, asset: SpaAsset, request_headers: Headers, method: str = "GET") -> Response:
+        """Serve asset with the best encoding the client accepts, or a 304."""
+        encoding = negotiate_encoding(request_headers.get("accept-encoding"), list(asset.encoded))
+        etag = f'"{asset.etag}-{encoding}"' if encoding else f'"{asset.etag}"'
+        headers = {
+            "etag": etag,
+            "cache-control": asset.cache_control,
+            "last-modified": asset.last_modified,
+        }
+        if asset.encoded:
+            headers["vary"] = "Accept-Encoding"
+
+        if etag_matches(etag, request_headers.get("if-none-match")):
+            self._stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        self._stats["served"] += 1
+        if asset.body is None:
+            return FileResponse(asset.path, headers=headers, media_type=asset.media_type, method=method)
+        body = asset.body
+        if encoding:
+            self._stats["encoded"] += 1
+            headers["content-encoding"] = encoding
+            body = asset.encoded[encoding]
+        if method == "HEAD":
+            headers["content-length"] = str(len(body))
+            body = b""
+        return Response(body, headers=headers, media_type=asset.media_type)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "files": len(self._assets),
+            "bytes": sum(len(asset.body or b"") for asset in self._assets.values()),
+            "encoded_bytes": sum(
+                len(body) for asset in self._assets.values() for body in asset.encoded.values()
+            ),
+        }
@@ -0,0 +1,121 @@
+import os
+import re
+from email.utils import formatdate
+from hashlib import md5
+from typing import Dict, Optional
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# <sha256>.<ext> originals (services/upload.py). Derivatives
+# (<sha256>-<width>w.<ext>) are not included: they can be regenerated with
+# other quality/format settings under the same name.
+CONTENT_ADDRESSED_NAME = re.compile(r"^([0-9a-f]{64})\.[a-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Whether an If-None-Match header (possibly a list of weak tags) matches etag."""
+    if if_none_match is None:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    FileResponse that hands the file to the server when it offers an ASGI
+    zero-copy extension (http.response.pathsend or zerocopysend, e.g.
+    Granian/NGINX Unit), and otherwise streams it in large chunks.
+    """
+    chunk_size = 256 * 1024
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        if self.send_header_only or self.stat_result is None or not (
+            "http.response.pathsend" in extensions or "http.response.zerocopysend" in extensions
+        ):
+            await super().__call__(scope, receive, send)
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+        else:
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.fileno(),
+                    "count": self.stat_result.st_size,
+                })
+        if self.background is not None:
+            await self.background()
+
+
+class UploadStaticFiles(StaticFiles):
+    """
+    Serves /uploads with strong ETags and long-lived caching.
+
+    Content-addressed originals never change meaning, so they are served
+    "immutable" for a year; derivatives and older uuid-named uploads get
+    max_age seconds and an ETag from their mtime and size.
+    With offload set to "x-accel-redirect" (nginx) or "x-sendfile"
+    (Apache/lighttpd), Python only sends headers and the front proxy
+    streams the bytes.
+    """
+
+    def __init__(self, *, directory: str, max_age: int, offload: str = "", accel_prefix: str = ""):
+        super().__init__(directory=directory)
+        self.max_age = max_age
+        self.offload = offload.lower()
+        self.accel_prefix = accel_prefix.rstrip("/") + "/"
+
+    def cache_headers(self, filename: str, stat_result: os.stat_result) -> Dict[str, str]:
+        match = CONTENT_ADDRESSED_NAME.match(filename)
+        if match:
+            etag = match.group(1)
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            etag = md5(f"{stat_result.st_mtime}-{stat_result.st_size}".encode()).hexdigest()
+            cache_control = f"public, max-age={self.max_age}"
+        return {
+            "etag": f'"{etag}"',
+            "cache-control": cache_control,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        }
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        headers = self.cache_headers(os.path.basename(full_path), stat_result)
+
+        if self.offload in ("x-accel-redirect", "x-sendfile"):
+            media_type = FileResponse(full_path).media_type
+            if self.offload == "x-accel-redirect":
+                relative = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                headers["x-accel-redirect"] = self.accel_prefix + relative
+            else:
+                headers["x-sendfile"] = os.path.abspath(full_path)
+            response = Response(status_code=status_code, headers=headers, media_type=media_type)
+        else:
+            response = ZeroCopyFileResponse(
+                full_path,
+                status_code=status_code,
+                headers=headers,
+                stat_result=stat_result,
+                method=scope["method"],
+            )
+
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match takes precedence over If-Modified-Since
+            return etag_matches(response_headers.get("etag", ""), if_none_match)
+        return super().is_not_modified(response_headers, request_headers)
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+from uuid import UUID
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from ..config import settings
+from ..models.user import User
+
+
+class UserCache:
+    """
+    Bounded LRU + TTL cache of bearer token -> user column snapshot, so an
+    authenticated request can skip JWT decoding and the users lookup.
+    Entries never outlive the token's own expiry.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # token -> (user_id, snapshot, expires_at)
+        self._tokens_by_user: Dict[UUID, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped on every invalidation; see generation()
+        self._generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[2] <= time.monotonic():
+                if entry is not None:
+                    self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self) -> int:
+        """
+        Take this before reading a user from the database and pass it to
+        put(): if any user was invalidated in between, the row read may
+        predate that change and is not cached.
+        """
+        return self._generation
+
+    def put(self, token: str, user: User, token_exp: Optional[float] = None, generation: Optional[int] = None):
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+        snapshot = {c.key: getattr(user, c.key) for c in User.__mapper__.column_attrs}
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (user.id, snapshot, time.monotonic() + ttl)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: UUID):
+        """Drop every cached token for a user (called whenever the user row changes)."""
+        with self._lock:
+            self._generation += 1
+            tokens = self._tokens_by_user.pop(user_id, set())
+            for token in tokens:
+                self._entries.pop(token, None)
+            self.invalidations += len(tokens)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+    def _remove(self, token: str):
+        user_id, _, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+def attach_user(db: Session, snapshot: Dict[str, Any]) -> User:
+    """
+    Rebuild a User from a cached snapshot and attach it to the request's
+    session without a SELECT, so routes can still lazy-load relationships
+    and modify and commit it as usual.
+    """
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+user_cache = UserCache(settings.user_cache_size, settings.user_cache_ttl_seconds)
+
+
+# Any change to a user row (password reset, GitHub connect/disconnect,
+# OAuth linking, ...) drops that user's cached tokens. Flushes only record
+# the user; eviction happens once the change is committed, otherwise a
+# concurrent request could re-cache the old, still committed row.
+DIRTY_USERS_KEY = "user_cache_dirty_users"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_cached_user_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(DIRTY_USERS_KEY, set()).add(target.id)
+    else:
+        user_cache.invalidate_user(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop(DIRTY_USERS_KEY, ()):
+        user_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session):
+    session.info.pop(DIRTY_USERS_KEY, None)
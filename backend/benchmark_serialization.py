@@ -0,0 +1,91 @@
+"""
+Benchmark: serialize a GET /api/apps page through FastAPI's response_model
+path (validate, dump to Python, stdlib json) versus utils/fast_json.py
+(validate once + pydantic-core JSON, and the trusted orjson path).
+Uses in-memory objects only; no database needed.
+Run with: python benchmark_serialization.py [apps_per_page] [rounds]
+"""
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.models.app import App, AppStatus, ProgressMode
+from app.models.image import Image
+from app.models.tag import Tag
+from app.models.user import User
+from app.routers.apps import _build_app_list, app_list_serializer
+from app.schemas.app import AppResponse
+
+def make_apps(count: int) -> List[App]:
+    now = datetime.utcnow()
+    creator = User(id=uuid.uuid4(), username="alice", full_name="Alice Example")
+    tags = [Tag(id=uuid.uuid4(), name=name) for name in ("ai", "tools", "productivity")]
+    apps = []
+    for i in range(count):
+        app = App(
+            id=uuid.uuid4(), name=f"App {i}", full_description="Lorem ipsum dolor sit amet. " * 40,
+            creator_id=creator.id, status=AppStatus.in_development, is_published=True,
+            progress=40, progress_mode=ProgressMode.manual, repository_url="https://github.com/o/r",
+            upvotes=12, downvotes=3, comment_count=5, task_count=4, completed_task_count=2,
+            created_at=now, updated_at=now
+        )
+        app.creator = creator
+        app.tags = tags
+        app.images = [
+            Image(
+                id=uuid.uuid4(), app_id=app.id, image_url=f"/uploads/{uuid.uuid4().hex}.png",
+                is_featured=j == 0, order_index=j, created_at=now,
+                variants=[
+                    {"url": f"/uploads/x-{w}w.{fmt}", "width": w, "height": w // 2, "format": fmt}
+                    for w in (320, 640, 1280) for fmt in ("webp", "avif")
+                ]
+            )
+            for j in range(3)
+        ]
+        apps.append(app)
+    return apps
+
+def bench(label: str, fn, rounds: int) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    per_call = (time.perf_counter() - start) / rounds * 1000
+    size = f"  ({len(result)} bytes)" if isinstance(result, bytes) else ""
+    print(f"{label:<38} {per_call:8.2f} ms/page{size}")
+    return per_call
+
+def main(count: int, rounds: int):
+    apps = make_apps(count)
+    field = create_response_field(name="Response", type_=List[AppResponse])
+    loop = asyncio.new_event_loop()
+
+    def response_model_path():
+        content = loop.run_until_complete(serialize_response(field=field, response_content=_build_app_list(apps)))
+        return JSONResponse(content).body
+
+    def validated_path():
+        return app_list_serializer.respond(_build_app_list(apps)).body
+
+    def trusted_path():
+        return app_list_serializer.respond(_build_app_list(apps), trusted=True).body
+
+    def build_only():
+        return _build_app_list(apps)
+
+    print(f"{count} apps per page, {rounds} rounds")
+    baseline = bench("response_model + json (before)", response_model_path, rounds)
+    validated = bench("ResponseSerializer (validate once)", validated_path, rounds)
+    trusted = bench("ResponseSerializer (trusted, orjson)", trusted_path, rounds)
+    built = bench("  of which building the dicts", build_only, rounds)
+    print(f"Speedup: {baseline / validated:.1f}x validated, {baseline / trusted:.1f}x trusted "
+          f"(serialization alone: {(baseline - built) / max(trusted - built, 1e-9):.1f}x)")
+    loop.close()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100, int(sys.argv[2]) if len(sys.argv) > 2 else 50)
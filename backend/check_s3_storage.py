@@ -0,0 +1,114 @@
+"""
+Check script: run the direct-upload flow against the configured S3-compatible
+store (STORAGE_BACKEND=s3, S3_BUCKET, S3_ENDPOINT_URL, ...), e.g. a local
+MinIO before pointing production at a new bucket. It presigns and PUTs an
+image, finalizes and publishes it, checks that a tampered upload is refused
+and that re-uploading identical content is deduplicated, then deletes what
+it stored. No database is needed.
+Run with: python check_s3_storage.py
+"""
+import base64
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import httpx
+from fastapi import HTTPException
+from PIL import Image as PILImage
+from app.services.storage import S3Storage, get_storage
+from app.services.upload import (
+    create_direct_upload, delete_upload_file, discard_upload, finalize_direct_upload, publish_upload
+)
+
+failures = []
+
+def check(label: str, ok: bool, detail: str = ""):
+    print(f"{'ok  ' if ok else 'FAIL'} {label}{f' ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+def make_image() -> bytes:
+    """A small PNG of random noise, so every run stores new content."""
+    image = PILImage.frombytes("RGB", (64, 64), os.urandom(64 * 64 * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+def put(upload: dict, body: bytes) -> httpx.Response:
+    return httpx.request(upload["method"], upload["url"], content=body, headers=upload["headers"], timeout=30)
+
+def finalize_and_publish(sha256: str) -> str:
+    saved = finalize_direct_upload(sha256, "image/png")
+    try:
+        publish_upload(saved)
+    finally:
+        discard_upload(saved)
+    return saved.url
+
+def main():
+    storage = get_storage()
+    if not isinstance(storage, S3Storage):
+        print("STORAGE_BACKEND is not s3; nothing to check.")
+        sys.exit(1)
+    print(f"Checking bucket {storage.bucket} ({storage.public_url})")
+    stored = []
+
+    try:
+        # Direct upload: presign, PUT, finalize, publish
+        data = make_image()
+        sha256 = hashlib.sha256(data).hexdigest()
+        upload = create_direct_upload(sha256, "image/png", len(data))["upload"]
+        check("presigned upload for new content", upload is not None)
+        response = put(upload, data)
+        check("PUT to the presigned URL", response.status_code == 200, f"HTTP {response.status_code}")
+        url = finalize_and_publish(sha256)
+        stored.append(url)
+        key = storage.key_from_url(url)
+        check("object stored under its content hash", storage.size(key) == len(data))
+        check("stored checksum matches", storage.checksum(key) == base64.b64encode(hashlib.sha256(data).digest()).decode())
+        check("staged object removed", not storage.exists(f"incoming/{key}"))
+
+        # Identical content: no second upload needed
+        check("identical content deduplicated", create_direct_upload(sha256, "image/png", len(data))["upload"] is None)
+        check("finalize of deduplicated content", finalize_and_publish(sha256) == url)
+
+        # Tampered body: the store should refuse it, finalize must
+        tampered = make_image()
+        tampered_sha256 = hashlib.sha256(tampered).hexdigest()
+        upload = create_direct_upload(tampered_sha256, "image/png", len(tampered))["upload"]
+        body = tampered[:-1] + bytes([tampered[-1] ^ 0xFF])
+        response = put(upload, body)
+        if response.status_code == 200:
+            try:
+                finalize_and_publish(tampered_sha256)
+                rejected = False
+            except HTTPException as e:
+                rejected = e.status_code == 400
+            check("tampered upload rejected by finalize", rejected, "the store accepted the body")
+        else:
+            check("tampered upload rejected by the store", True, f"HTTP {response.status_code}")
+        check("tampered content not stored", not storage.exists(f"{tampered_sha256}.png"))
+        check("tampered staged object removed", not storage.exists(f"incoming/{tampered_sha256}.png"))
+
+        # Multipart uploads and derivatives go through save()
+        fd, path = tempfile.mkstemp(dir=storage.scratch_dir(), prefix="check-")
+        os.close(fd)
+        other = make_image()
+        with open(path, "wb") as f:
+            f.write(other)
+        other_key = f"{hashlib.sha256(other).hexdigest()}.png"
+        storage.save(other_key, path)
+        stored.append(storage.url(other_key))
+        check("save() from a local file", storage.read_head(other_key, 8) == other[:8])
+    finally:
+        for url in stored:
+            delete_upload_file(url)
+
+    if failures:
+        print(f"{len(failures)} check(s) failed")
+        sys.exit(1)
+    print("All checks passed")
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ from app.models.tag import Tag
 from app.models.vote import Vote, VoteType
 from app.models.comment import Comment
 from app.utils.security import get_password_hash
+from app.services.counters import recount_app_counters
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -258,6 +259,10 @@ def create_mock_data():
         
         db.commit()
         
+        # Votes and comments were inserted directly, so fill in the app counters
+        recount_app_counters(db)
+        db.commit()
+        
         print("✅ Mock data created successfully!")
         print("\nTest Users:")
         print("  - admin / admin123 (Admin)")
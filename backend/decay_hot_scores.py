@@ -0,0 +1,10 @@
+"""
+Run one hot-score decay pass (the API also does this every
+HOT_SCORE_DECAY_INTERVAL_MINUTES). Useful from cron when that is disabled.
+Run with: python decay_hot_scores.py
+"""
+from app.services.ranking import decay_hot_scores
+
+if __name__ == "__main__":
+    updated = decay_hot_scores()
+    print(f"Decayed hot scores for {updated} apps.")
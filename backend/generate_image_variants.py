@@ -0,0 +1,31 @@
+"""
+Backfill script: create resized derivatives (IMAGE_VARIANT_WIDTHS x
+IMAGE_VARIANT_FORMATS) for uploaded images that don't have any yet.
+Run with: python generate_image_variants.py [--all]
+"""
+import asyncio
+import sys
+from app.database import SessionLocal
+from app.models.image import Image
+from app.services.image_variants import create_image_variants, shutdown_image_workers
+
+async def main(regenerate: bool):
+    db = SessionLocal()
+    try:
+        query = db.query(Image.id, Image.image_url)
+        if not regenerate:
+            query = query.filter(Image.variants.is_(None))
+        images = query.all()
+    finally:
+        db.close()
+
+    print(f"Generating derivatives for {len(images)} images...")
+    try:
+        for image_id, image_url in images:
+            await create_image_variants(image_id, image_url)
+    finally:
+        shutdown_image_workers()
+    print("Done.")
+
+if __name__ == "__main__":
+    asyncio.run(main("--all" in sys.argv))
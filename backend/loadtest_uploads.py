@@ -0,0 +1,98 @@
+"""
+Load test: upload images concurrently to a running server and report the
+event-loop lag it measured during the run (GET /api/metrics -> event_loop,
+diffed against a reading taken just before). Uploaded images are deleted
+again afterwards.
+Run with: python loadtest_uploads.py <base_url> <access_token> <app_id> [uploads] [concurrency]
+"""
+import asyncio
+import io
+import os
+import sys
+import time
+import httpx
+from PIL import Image as PILImage
+
+
+def make_image() -> bytes:
+    """A ~1MB PNG of random noise, so every upload is a distinct blob."""
+    image = PILImage.frombytes("RGB", (600, 600), os.urandom(600 * 600 * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def run(base_url: str, token: str, app_id: str, uploads: int, concurrency: int):
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    image_ids = []
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=60) as client:
+        before = (await client.get("/api/metrics")).json()["event_loop"]
+        polled_lag_ms = []
+        done = asyncio.Event()
+
+        async def poll_lag():
+            # The monitor's max_lag_ms is lifetime-wide (startup included);
+            # sample last_lag_ms so a run below that peak still has a max
+            while not done.is_set():
+                metrics = (await client.get("/api/metrics")).json()["event_loop"]
+                polled_lag_ms.append(metrics["last_lag_ms"])
+                try:
+                    await asyncio.wait_for(done.wait(), metrics["interval_seconds"])
+                except asyncio.TimeoutError:
+                    pass
+
+        async def upload(n: int):
+            payload = make_image()
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    f"/api/apps/{app_id}/images",
+                    files={"file": (f"load-{n}.png", payload, "image/png")}
+                )
+                latencies.append(time.perf_counter() - started)
+            if response.status_code == 201:
+                image_ids.append(response.json()["id"])
+            else:
+                print(f"Upload {n} failed: {response.status_code} {response.text[:200]}")
+
+        poller = asyncio.create_task(poll_lag())
+        started = time.perf_counter()
+        await asyncio.gather(*(upload(n) for n in range(uploads)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await poller
+
+        after = (await client.get("/api/metrics")).json()["event_loop"]
+
+        for image_id in image_ids:
+            await client.delete(f"/api/apps/images/{image_id}")
+
+    latencies.sort()
+    print(f"{len(image_ids)}/{uploads} uploads in {elapsed:.1f}s (concurrency {concurrency})")
+    if latencies:
+        print(f"Upload latency p50 {latencies[len(latencies) // 2] * 1000:.0f}ms, "
+              f"max {latencies[-1] * 1000:.0f}ms")
+
+    samples = after["samples"] - before["samples"]
+    if samples <= 0:
+        print("No event loop samples during the run (is LOOP_LAG_INTERVAL_SECONDS > 0?)")
+        return
+    average = (after["total_lag_ms"] - before["total_lag_ms"]) / samples
+    if after["max_lag_ms"] > before["max_lag_ms"]:
+        max_lag = f"{after['max_lag_ms']}ms"  # the lifetime peak was set during this run
+    else:
+        max_lag = f"{max(polled_lag_ms, default=0.0)}ms (highest polled sample)"
+    print(f"Event loop lag during the run: avg {average:.2f}ms, max {max_lag}, "
+          f"slow samples {after['slow_samples'] - before['slow_samples']} of {samples}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Usage: python loadtest_uploads.py <base_url> <access_token> <app_id> [uploads] [concurrency]")
+        sys.exit(1)
+    uploads = int(sys.argv[4]) if len(sys.argv) > 4 else 50
+    concurrency = int(sys.argv[5]) if len(sys.argv) > 5 else 10
+    asyncio.run(run(sys.argv[1], sys.argv[2], sys.argv[3], uploads, concurrency))
@@ -0,0 +1,55 @@
+"""
+Migration script: copy files from the local upload dir into the configured
+storage backend (STORAGE_BACKEND=s3, ...) and point images.image_url and
+their variants at the new URLs. Local files are left in place.
+Run with: python migrate_uploads_to_storage.py
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from app.config import settings
+from app.database import SessionLocal
+from app.models.image import Image
+from app.services.storage import LocalStorage, get_storage
+
+def _copy(local: LocalStorage, storage, url: str) -> str:
+    key = local.key_from_url(url)
+    if not key or not local.exists(key):
+        return url
+    if not storage.exists(key):
+        # save() moves its input, so hand it a copy
+        fd, tmp_path = tempfile.mkstemp(dir=storage.scratch_dir(), prefix="migrate-")
+        os.close(fd)
+        shutil.copyfile(Path(settings.upload_dir) / key, tmp_path)
+        storage.save(key, tmp_path)
+    return storage.url(key)
+
+def migrate():
+    storage = get_storage()
+    if isinstance(storage, LocalStorage):
+        print("STORAGE_BACKEND is local; nothing to migrate.")
+        return
+    local = LocalStorage(settings.upload_dir)
+
+    db = SessionLocal()
+    try:
+        images = db.query(Image).all()
+        print(f"Migrating {len(images)} images...")
+        for image in images:
+            image.image_url = _copy(local, storage, image.image_url)
+            if image.variants:
+                image.variants = [
+                    {**variant, "url": _copy(local, storage, variant["url"])}
+                    for variant in image.variants
+                ]
+            db.commit()
+        print("Migration completed successfully!")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,25 @@
+"""
+Repair script: recompute App.upvotes/downvotes/comment_count and the task
+counters (plus auto-mode progress) from the votes, comments and app_tasks
+tables and fix any counters that have drifted.
+Run with: python recount_app_counters.py
+"""
+from app.database import SessionLocal
+from app.services.counters import recount_app_counters, recount_task_counters
+
+def main():
+    db = SessionLocal()
+    try:
+        fixed = recount_app_counters(db)
+        fixed_tasks = recount_task_counters(db)
+        db.commit()
+        print(f"Recounted counters: {fixed} apps corrected.")
+        print(f"Recounted task counters: {fixed_tasks} apps corrected.")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
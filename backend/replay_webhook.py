@@ -0,0 +1,44 @@
+"""
+Replay a saved GitHub/GitLab push payload against the webhook endpoint,
+signed with the configured secret, to test webhook handling locally.
+Run with: python replay_webhook.py github payload.json [http://localhost:8000]
+"""
+import hashlib
+import hmac
+import sys
+import httpx
+from app.config import settings
+
+
+def replay(platform: str, payload_path: str, base_url: str = "http://localhost:8000"):
+    with open(payload_path, "rb") as f:
+        body = f.read()
+
+    headers = {"Content-Type": "application/json"}
+    if platform == "github":
+        secret = settings.github_webhook_secret
+        headers["X-GitHub-Event"] = "push"
+        headers["X-Hub-Signature-256"] = "sha256=" + hmac.new(
+            secret.encode("utf-8"), body, hashlib.sha256
+        ).hexdigest()
+    elif platform == "gitlab":
+        secret = settings.gitlab_webhook_secret
+        headers["X-Gitlab-Event"] = "Push Hook"
+        headers["X-Gitlab-Token"] = secret
+    else:
+        print("Platform must be 'github' or 'gitlab'")
+        sys.exit(1)
+
+    if not secret:
+        print(f"{platform.upper()}_WEBHOOK_SECRET is not set")
+        sys.exit(1)
+
+    response = httpx.post(f"{base_url}/api/webhooks/{platform}", content=body, headers=headers)
+    print(f"{response.status_code}: {response.text}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python replay_webhook.py <github|gitlab> <payload.json> [base_url]")
+        sys.exit(1)
+    replay(*sys.argv[1:4])
@@ -4,7 +4,7 @@ import { ThumbsUp, Clock } from "lucide-react";
 import { Card } from "./ui/card";
 import type { App } from "../lib/types";
 import type { User } from "../lib/auth";
-import { getImageUrl } from "../lib/api";
+import { getImageUrl, getImageSrcSet } from "../lib/api";
 
 interface AppCardProps {
   app: App;
@@ -63,6 +63,8 @@ export default function AppCard({ app, user }: AppCardProps) {
             ) : (
               <img
                 src={getImageUrl(app.images[0].image_url)}
+                srcSet={getImageSrcSet(app.images[0].srcset?.webp)}
+                sizes="40px"
                 alt={app.name}
                 className="w-10 h-10 rounded-lg object-cover"
                 onError={() => setImageError(true)}
@@ -29,6 +29,12 @@ export function getImageUrl(path: string | undefined | null): string {
   return `${UPLOAD_BASE_URL}${path}`;
 }
 
+// Resolve a backend srcset string (relative URLs + width descriptors) for <img srcSet>
+export function getImageSrcSet(srcset: string | undefined | null): string | undefined {
+  if (!srcset) return undefined;
+  return srcset.split(', ').map((entry) => getImageUrl(entry)).join(', ');
+}
+
 // Track if we're currently refreshing to avoid multiple refresh attempts
 let isRefreshing = false;
 let failedQueue: Array<{
@@ -134,3 +140,49 @@ export const api = USE_MOCK_DATA ? mockApi : (() => {
 
   return axiosInstance;
 })();
+
+async function sha256Hex(file: File): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+/**
+ * Upload an app image. When the backend stores uploads in object storage the
+ * file goes straight there with a presigned PUT and the API only finalizes it;
+ * otherwise (or without WebCrypto) it falls back to a multipart upload.
+ */
+export async function uploadAppImage(appId: string, file: File, isFeatured = false) {
+  if (!USE_MOCK_DATA && window.crypto?.subtle) {
+    const sha256 = await sha256Hex(file);
+    try {
+      const { data } = await api.post(`/apps/${appId}/images/direct-upload`, {
+        sha256,
+        content_type: file.type,
+        size: file.size,
+      });
+      if (data.upload) {
+        const response = await fetch(data.upload.url, {
+          method: data.upload.method,
+          headers: data.upload.headers,
+          body: file,
+        });
+        if (!response.ok) {
+          throw new Error(`Upload failed (${response.status})`);
+        }
+      }
+      return await api.post(`/apps/${appId}/images/finalize`, {
+        sha256,
+        content_type: file.type,
+        is_featured: isFeatured,
+      });
+    } catch (error: any) {
+      if (error.response?.status !== 501) {
+        throw error;
+      }
+    }
+  }
+
+  const formData = new FormData();
+  formData.append('file', file);
+  return api.post(`/apps/${appId}/images?is_featured=${isFeatured}`, formData);
+}
@@ -15,6 +15,7 @@ export interface AppImage {
   is_featured: boolean
   order_index: number
   created_at: string
+  srcset?: Record<string, string>  // derivative srcset per format, e.g. { webp: '/uploads/a-320w.webp 320w, ...' }
 }
 
 export interface AppTag {
@@ -55,6 +56,8 @@ export interface App {
   downvotes?: number
   total_votes?: number
   comment_count: number
+  task_count?: number
+  completed_task_count?: number
   creator?: UserInfo
   has_github_token?: boolean
 }
@@ -246,6 +249,8 @@ export interface CommitsResponse {
   commits: CommitInfo[]
   repo_info?: RepoInfo
   error?: string
+  commits_error?: string
+  repo_info_error?: string
 }
 
 export interface GitHubStatus {
@@ -32,7 +32,7 @@ import {
 import NavUser from "../components/NavUser";
 import NotificationBell from "../components/NotificationBell";
 import Logo from "../components/Logo";
-import { api, getImageUrl } from "../lib/api";
+import { api, getImageUrl, getImageSrcSet, uploadAppImage } from "../lib/api";
 import type { User } from "../lib/auth";
 import type { Team, App, VoteInfo } from "../lib/types";
 import { usePinnedTeam } from "../lib/pinnedTeam";
@@ -124,9 +124,7 @@ export default function AppDetail({ user }: AppDetailProps) {
       setUploading(true);
       try {
         for (const file of acceptedFiles) {
-          const formData = new FormData();
-          formData.append("file", file);
-          await api.post(`/apps/${id}/images`, formData);
+          await uploadAppImage(id, file);
         }
         queryClient.invalidateQueries({ queryKey: ["app", id] });
       } catch (error: any) {
@@ -646,7 +644,7 @@ export default function AppDetail({ user }: AppDetailProps) {
                         selectedImageIndex === idx ? "border-primary" : "border-transparent hover:border-border"
                       }`}
                     >
-                      <img src={getImageUrl(image.image_url)} alt="" className="w-full h-full object-cover" />
+                      <img src={getImageUrl(image.image_url)} srcSet={getImageSrcSet(image.srcset?.webp)} sizes="56px" alt="" className="w-full h-full object-cover" />
                     </button>
                   ))}
                   <div
@@ -983,7 +981,7 @@ export default function AppDetail({ user }: AppDetailProps) {
                             selectedImageIndex === idx ? "border-primary" : "border-transparent hover:border-border"
                           }`}
                         >
-                          <img src={getImageUrl(image.image_url)} alt="" className="w-full h-full object-cover" />
+                          <img src={getImageUrl(image.image_url)} srcSet={getImageSrcSet(image.srcset?.webp)} sizes="56px" alt="" className="w-full h-full object-cover" />
                         </button>
                       ))}
                     </div>
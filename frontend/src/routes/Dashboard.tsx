@@ -17,7 +17,7 @@ import {
   Lightbulb,
   Globe,
 } from "lucide-react";
-import { api, getImageUrl } from "../lib/api";
+import { api, getImageUrl, getImageSrcSet } from "../lib/api";
 import type { User } from "../lib/auth";
 import type { App } from "../lib/types";
 import { usePinnedTeam } from "../lib/pinnedTeam";
@@ -150,6 +150,8 @@ export default function Dashboard({ user }: DashboardProps) {
               ) : (
                 <img
                   src={getImageUrl(app.images[0].image_url)}
+                  srcSet={getImageSrcSet(app.images[0].srcset?.webp)}
+                  sizes="48px"
                   alt={app.name}
                   className="w-12 h-12 rounded-lg object-cover"
                 />
@@ -2,7 +2,7 @@ import { useState, useMemo } from 'react'
 import { useNavigate, useSearchParams, Link } from 'react-router-dom'
 import { useDropzone } from 'react-dropzone'
 import { Upload, X, Save, ArrowLeft, Image as ImageIcon, FolderKanban, Lightbulb, Pin } from 'lucide-react'
-import { api } from '../lib/api'
+import { api, uploadAppImage } from '../lib/api'
 import type { User } from '../lib/auth'
 import type { App } from '../lib/types'
 import { usePinnedTeam } from '../lib/pinnedTeam'
@@ -86,10 +86,7 @@ export default function NewApp({ user }: NewAppProps) {
 
       // Upload images
       for (const image of images) {
-        const imageFormData = new FormData()
-        imageFormData.append('file', image)
-        // Don't set Content-Type header - browser will set it with boundary
-        await api.post(`/apps/${appId}/images?is_featured=${images.indexOf(image) === 0}`, imageFormData)
+        await uploadAppImage(appId, image, images.indexOf(image) === 0)
       }
 
       navigate(`/apps/${appId}`)
@@ -11,7 +11,7 @@ import NotificationBell from '../components/NotificationBell'
 import Logo from '../components/Logo'
 import { Card } from '../components/ui/card'
 import AppCard from '../components/AppCard'
-import { api, getImageUrl } from '../lib/api'
+import { api, getImageUrl, getImageSrcSet } from '../lib/api'
 
 type GridSize = 3 | 4 | 5
 type ViewMode = 'grid' | 'list'
@@ -152,6 +152,8 @@ export default function TeamDetail({ user }: TeamDetailProps) {
               ) : (
                 <img
                   src={getImageUrl(app.images[0].image_url)}
+                  srcSet={getImageSrcSet(app.images[0].srcset?.webp)}
+                  sizes="48px"
                   alt={app.name}
                   className="w-12 h-12 rounded-lg object-cover"
                 />